@@ -0,0 +1,69 @@
+"""Startup benchmark: how long `import app` takes (what a gunicorn worker pays
+before it can accept connections) and how long the first and second requests
+take after it, each measured in a fresh interpreter.
+
+    python bench_startup.py                     # against the DB_* database
+    BENCH_DB_DOWN=1 python bench_startup.py     # point at a closed port instead
+    DB_INIT=skip BENCH_RUNS=10 python bench_startup.py
+
+With BENCH_DB_DOWN=1 the import should still be fast and the first request a
+503 after DB_INIT_WAIT, instead of the worker exiting.
+"""
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+
+N_RUNS = int(os.getenv("BENCH_RUNS", 5))
+DB_DOWN = os.getenv("BENCH_DB_DOWN") == "1"
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Runs in the child; prints one JSON line of timings in milliseconds
+CHILD = """
+import json, time
+t0 = time.perf_counter()
+import app
+t1 = time.perf_counter()
+client = app.app.test_client()
+first = client.get("/")
+t2 = time.perf_counter()
+second = client.get("/")
+t3 = time.perf_counter()
+print(json.dumps({
+    "import_ms": (t1 - t0) * 1000,
+    "first_ms": (t2 - t1) * 1000,
+    "second_ms": (t3 - t2) * 1000,
+    "first_status": first.status_code,
+    "second_status": second.status_code,
+}))
+"""
+
+def closed_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def run_once(env):
+    proc = subprocess.run([sys.executable, "-c", CHILD], cwd=HERE, env=env, capture_output=True, text=True)
+    if proc.returncode != 0:
+        sys.exit(f"app exited with {proc.returncode}:\n{proc.stderr}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+def main():
+    env = dict(os.environ)
+    if DB_DOWN:
+        env.update(DB_HOST="127.0.0.1", DB_PORT=str(closed_port()))
+    runs = [run_once(env) for _ in range(N_RUNS)]
+
+    print(f"DB_INIT={env.get('DB_INIT', 'lazy')} db_down={DB_DOWN} runs={N_RUNS}")
+    for key in ("import_ms", "first_ms", "second_ms"):
+        values = [r[key] for r in runs]
+        print(f"{key:10} median={statistics.median(values):8.1f}  max={max(values):8.1f}")
+    print(f"status     first={sorted({r['first_status'] for r in runs})} "
+          f"second={sorted({r['second_status'] for r in runs})}")
+
+if __name__ == "__main__":
+    main()
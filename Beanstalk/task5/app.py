@@ -1,6 +1,13 @@
 import os
-from flask import Flask, render_template, request, redirect, session, url_for, flash
+import re
+import threading
+import click
+from collections import namedtuple
+from flask import Flask, render_template, request, redirect, session, url_for, flash, jsonify
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import case, event, func, inspect, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload
 from werkzeug.security import generate_password_hash, check_password_hash
 
 app = Flask(__name__)
@@ -15,11 +22,70 @@ DB_USER = os.getenv("DB_USER")
 DB_PASSWORD = os.getenv("DB_PASSWORD")
 DB_NAME = os.getenv("DB_NAME")
 
-app.config['SQLALCHEMY_DATABASE_URI'] = f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}/{DB_NAME}"
+app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv(
+    "DATABASE_URL", f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}/{DB_NAME}"
+)
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
+# Password hashing: algorithm is "pbkdf2:sha256" (cost = iterations) or "scrypt" (cost = N)
+PASSWORD_HASH_ALGORITHM = os.getenv("PASSWORD_HASH_ALGORITHM", "pbkdf2:sha256")
+PASSWORD_HASH_COST = int(os.getenv("PASSWORD_HASH_COST", 600000))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", os.cpu_count() or 2))
+PASSWORD_HASH_TIMEOUT = float(os.getenv("PASSWORD_HASH_TIMEOUT", 10))
+
+# Pagination: ?page=N on the listing pages, ?per_page=N capped at MAX_PER_PAGE
+PER_PAGE = int(os.getenv("PER_PAGE", 20))
+MAX_PER_PAGE = int(os.getenv("MAX_PER_PAGE", 100))
+
+# Movie leaderboard: movies need this many reviews to be ranked
+TOP_MIN_REVIEWS = int(os.getenv("TOP_MIN_REVIEWS", 3))
+TOP_MAX = 100
+
+# Search: prefix matches on review.movie_lower; SEARCH_FULLTEXT=1 (MySQL only) also
+# matches words anywhere in the title through the ft_review_movie FULLTEXT index,
+# which create_table.sh builds. InnoDB skips words shorter than innodb_ft_min_token_size.
+SEARCH_FULLTEXT = os.getenv("SEARCH_FULLTEXT", "0") == "1"
+FT_MIN_TOKEN = int(os.getenv("FT_MIN_TOKEN", 3))
+
 db = SQLAlchemy(app)
 
+# -----------------------------
+#       PASSWORD HASHING
+# -----------------------------
+# Hashing runs on the request thread, at most PASSWORD_HASH_WORKERS at a time
+# (hashlib releases the GIL). A login storm waits up to PASSWORD_HASH_TIMEOUT
+# for a slot and then gets a 503, instead of pinning every worker thread.
+if PASSWORD_HASH_ALGORITHM == "scrypt":
+    PASSWORD_HASH_METHOD = f"scrypt:{PASSWORD_HASH_COST}:8:1"
+else:
+    PASSWORD_HASH_METHOD = f"{PASSWORD_HASH_ALGORITHM}:{PASSWORD_HASH_COST}"
+
+_hash_slots = threading.BoundedSemaphore(PASSWORD_HASH_WORKERS)
+
+class HashBusy(Exception):
+    pass
+
+def run_hash(fn, *args, timeout=PASSWORD_HASH_TIMEOUT, **kwargs):
+    if not _hash_slots.acquire(timeout=timeout):
+        raise HashBusy()
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        _hash_slots.release()
+
+def hash_password(password):
+    return run_hash(generate_password_hash, password, method=PASSWORD_HASH_METHOD)
+
+def verify_password(password_hash, password):
+    return run_hash(check_password_hash, password_hash, password)
+
+def needs_rehash(password_hash):
+    return password_hash.split("$", 1)[0] != PASSWORD_HASH_METHOD
+
+@app.errorhandler(HashBusy)
+def hash_pool_busy(e):
+    return ("Server is busy, please retry shortly.", 503, {"Retry-After": "2"})
+
 # -----------------------------
 #           MODELS
 # -----------------------------
@@ -29,21 +95,144 @@ class User(db.Model):
     email = db.Column(db.String(120), unique=True, nullable=False)
     password = db.Column(db.String(255), nullable=False)
 
+RATINGS = range(1, 6)
+
+def normalize_movie(movie):
+    # Must match the LOWER(TRIM(movie)) backfill in upgrade_schema()
+    return movie.strip().lower()
+
 class Review(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    movie = db.Column(db.String(200), nullable=False)
+    movie = db.Column(db.String(200), nullable=False, index=True)
+    # Case-folded copy of movie; its index serves prefix search
+    movie_lower = db.Column(
+        db.String(200), nullable=False, index=True,
+        default=lambda ctx: normalize_movie(ctx.get_current_parameters()["movie"]),
+    )
     content = db.Column(db.Text, nullable=False)
     rating = db.Column(db.Integer, nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey("user.id"))
     user = db.relationship("User", backref="reviews")
 
+# Per-movie rating totals, updated in the same transaction as each new review so
+# averages and the leaderboard never have to read the reviews table. Keyed by
+# normalize_movie(), so "Inception" and "inception " share one row.
+class MovieRating(db.Model):
+    __table_args__ = (db.Index("ix_movie_rating_avg_reviews", "avg_rating", "reviews"),)
+
+    movie = db.Column(db.String(200), primary_key=True)
+    # Title as a reviewer typed it, for display
+    title = db.Column(db.String(200))
+    reviews = db.Column(db.Integer, nullable=False, default=0)
+    rating_sum = db.Column(db.Integer, nullable=False, default=0)
+    # Stored rather than computed so the leaderboard can read it in index order
+    avg_rating = db.Column(db.Float, nullable=False, default=0)
+    stars_1 = db.Column(db.Integer, nullable=False, default=0)
+    stars_2 = db.Column(db.Integer, nullable=False, default=0)
+    stars_3 = db.Column(db.Integer, nullable=False, default=0)
+    stars_4 = db.Column(db.Integer, nullable=False, default=0)
+    stars_5 = db.Column(db.Integer, nullable=False, default=0)
+
+    def to_dict(self):
+        return {
+            "movie": self.title or self.movie,
+            "reviews": self.reviews,
+            "avg_rating": round(self.avg_rating, 2),
+            "histogram": {str(n): getattr(self, f"stars_{n}") for n in RATINGS},
+        }
+
+# -----------------------------
+#        SCHEMA UPGRADES
+# -----------------------------
+def upgrade_schema():
+    # create_all() skips tables that already exist, so add newer columns and indexes here
+    db.create_all()
+    if "movie_lower" not in {c["name"] for c in inspect(db.engine).get_columns("review")}:
+        db.session.execute(text("ALTER TABLE review ADD COLUMN movie_lower VARCHAR(200)"))
+        db.session.execute(text("UPDATE review SET movie_lower = LOWER(TRIM(movie))"))
+        db.session.commit()
+    for index in Review.__table__.indexes:
+        index.create(bind=db.engine, checkfirst=True)
+    if "title" not in {c["name"] for c in inspect(db.engine).get_columns("movie_rating")}:
+        # Older rows are keyed by the title as typed; re-key them by normalize_movie()
+        db.session.execute(text("ALTER TABLE movie_rating ADD COLUMN title VARCHAR(200)"))
+        db.session.commit()
+        rebuild_movie_ratings()
+    if SEARCH_FULLTEXT and db.engine.dialect.name == "mysql":
+        if "ft_review_movie" not in {i["name"] for i in inspect(db.engine).get_indexes("review")}:
+            db.session.execute(text("CREATE FULLTEXT INDEX ft_review_movie ON review (movie)"))
+            db.session.commit()
+
+if app.config["SQLALCHEMY_DATABASE_URI"].startswith("sqlite"):
+    # SQLite only uses an index for LIKE 'x%' when LIKE is case-sensitive; movie_lower
+    # is lowercase already, so this changes no results
+    with app.app_context():
+        @event.listens_for(db.engine, "connect")
+        def _sqlite_case_sensitive_like(dbapi_conn, conn_record):
+            dbapi_conn.execute("PRAGMA case_sensitive_like = ON")
+
+# -----------------------------
+#       RATING AGGREGATES
+# -----------------------------
+def add_movie_rating(movie, rating):
+    # Call before commit, in the transaction that inserts the review
+    key = normalize_movie(movie)
+    stars = getattr(MovieRating, f"stars_{rating}")
+    updated = db.session.query(MovieRating).filter_by(movie=key).update(
+        {MovieRating.reviews: MovieRating.reviews + 1,
+         MovieRating.rating_sum: MovieRating.rating_sum + rating,
+         stars: stars + 1},
+        synchronize_session=False,
+    )
+    if updated:
+        # Separate statement: MySQL and SQLite disagree on whether SET sees earlier assignments
+        db.session.query(MovieRating).filter_by(movie=key).update(
+            {MovieRating.avg_rating: MovieRating.rating_sum * 1.0 / MovieRating.reviews},
+            synchronize_session=False,
+        )
+    else:
+        db.session.add(MovieRating(movie=key, title=movie.strip(), reviews=1, rating_sum=rating, avg_rating=rating,
+                                   **{f"stars_{n}": int(n == rating) for n in RATINGS}))
+
+def rebuild_movie_ratings():
+    # One GROUP BY over the reviews table; for backfills and repairs only
+    rows = db.session.query(
+        Review.movie_lower, func.min(func.trim(Review.movie)), func.count(), func.sum(Review.rating),
+        *(func.sum(case((Review.rating == n, 1), else_=0)) for n in RATINGS),
+    ).group_by(Review.movie_lower).all()
+    db.session.query(MovieRating).delete()
+    db.session.add_all(
+        MovieRating(movie=movie, title=title, reviews=count, rating_sum=total, avg_rating=total / count,
+                    **{f"stars_{n}": stars for n, stars in zip(RATINGS, histogram)})
+        for movie, title, count, total, *histogram in rows
+    )
+    db.session.commit()
+    return len(rows)
+
+@app.cli.command("rebuild-ratings")
+def rebuild_ratings_command():
+    """Recompute movie_rating from the reviews table."""
+    click.echo(f"Rebuilt ratings for {rebuild_movie_ratings()} movies")
+
+# -----------------------------
+#          PAGINATION
+# -----------------------------
+# Templates get the current page's rows plus the Pagination object (page,
+# pages, has_next, ...) for navigation: two queries per page, whatever the table size.
+def paginate(query):
+    return db.paginate(query, per_page=PER_PAGE, max_per_page=MAX_PER_PAGE, error_out=False)
+
+def reviews_query():
+    # Templates show each review's author; load it in the same query
+    return db.select(Review).options(joinedload(Review.user)).order_by(Review.id.desc())
+
 # -----------------------------
 #           ROUTES
 # -----------------------------
 @app.route("/")
 def index():
-    reviews = Review.query.order_by(Review.id.desc()).all()
-    return render_template("index.html", reviews=reviews)
+    page = paginate(reviews_query())
+    return render_template("index.html", reviews=page.items, pagination=page)
 
 
 # -----------------------------
@@ -54,7 +243,7 @@ def register():
     if request.method == "POST":
         username = request.form["username"]
         email = request.form["email"]
-        password = generate_password_hash(request.form["password"])
+        password = hash_password(request.form["password"])
 
         if User.query.filter_by(email=email).first():
             flash("Email already registered!", "danger")
@@ -78,7 +267,11 @@ def login():
 
         user = User.query.filter_by(email=email).first()
 
-        if user and check_password_hash(user.password, password):
+        if user and verify_password(user.password, password):
+            if needs_rehash(user.password):
+                # Cost settings changed since this hash was made; upgrade it now
+                user.password = hash_password(password)
+                db.session.commit()
             session["user_id"] = user.id
             session["username"] = user.username
             return redirect("/")
@@ -106,17 +299,30 @@ def new_review():
     if request.method == "POST":
         movie = request.form["movie"]
         content = request.form["content"]
-        rating = request.form["rating"]
-
-        review = Review(
-            movie=movie,
-            content=content,
-            rating=int(rating),
-            user_id=session["user_id"]
-        )
-
-        db.session.add(review)
-        db.session.commit()
+        rating = request.form.get("rating", type=int)
+
+        if rating not in RATINGS:
+            flash("Rating must be between 1 and 5", "danger")
+            return redirect("/new_review")
+
+        for attempt in range(2):
+            review = Review(
+                movie=movie,
+                content=content,
+                rating=rating,
+                user_id=session["user_id"]
+            )
+
+            db.session.add(review)
+            add_movie_rating(movie, rating)
+            try:
+                db.session.commit()
+                break
+            except IntegrityError:
+                # Another request created this movie's row first; the retry updates it
+                db.session.rollback()
+                if attempt:
+                    raise
         return redirect("/")
 
     return render_template("new_review.html")
@@ -124,22 +330,67 @@ def new_review():
 
 @app.route("/review/<int:id>")
 def view_review(id):
-    review = Review.query.get_or_404(id)
+    review = db.get_or_404(Review, id, options=[joinedload(Review.user)])
     return render_template("view_review.html", review=review)
 
 
 # -----------------------------
 #       SEARCH ROUTE
 # -----------------------------
+# Rows are (id, movie, rating, username) tuples, not ORM objects. There is no total
+# count: the page fetches one row more than it shows to learn whether a next page exists.
+SearchPage = namedtuple("SearchPage", "page per_page has_prev has_next prev_num next_num")
+
+def fulltext_terms(q):
+    words = [w for w in re.findall(r"\w+", q) if len(w) >= FT_MIN_TOKEN]
+    return " ".join(f"+{w}*" for w in words)
+
+def search_reviews(q, page, per_page):
+    query = db.select(Review.id, Review.movie, Review.rating, User.username).outerjoin(User)
+    terms = fulltext_terms(q) if SEARCH_FULLTEXT and db.engine.dialect.name == "mysql" else ""
+    if terms:
+        query = query.filter(Review.movie.match(terms)).order_by(Review.id.desc())
+    else:
+        prefix = normalize_movie(q).replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        query = query.filter(Review.movie_lower.like(f"{prefix}%", escape="\\")).order_by(Review.movie_lower, Review.id)
+    rows = db.session.execute(query.limit(per_page + 1).offset((page - 1) * per_page)).all()
+    return rows[:per_page], len(rows) > per_page
+
 @app.route("/search")
 def search():
-    q = request.args.get("q", "")
+    q = request.args.get("q", "")[:200]
     results = []
+    pagination = None
 
-    if q:
-        results = Review.query.filter(Review.movie.ilike(f"%{q}%")).all()
+    if q.strip():
+        page = max(request.args.get("page", 1, type=int), 1)
+        per_page = max(min(request.args.get("per_page", PER_PAGE, type=int), MAX_PER_PAGE), 1)
+        results, has_next = search_reviews(q, page, per_page)
+        pagination = SearchPage(page, per_page, page > 1, has_next, page - 1 if page > 1 else None,
+                                page + 1 if has_next else None)
 
-    return render_template("search_results.html", results=results, q=q)
+    return render_template("search_results.html", results=results, q=q, pagination=pagination)
+
+
+# -----------------------------
+#       MOVIE RATINGS
+# -----------------------------
+@app.route("/movies/top")
+def top_movies():
+    limit = max(1, min(request.args.get("n", 10, type=int), TOP_MAX))
+    min_reviews = request.args.get("min_reviews", TOP_MIN_REVIEWS, type=int)
+    movies = db.session.scalars(
+        db.select(MovieRating)
+        .filter(MovieRating.reviews >= min_reviews)
+        .order_by(MovieRating.avg_rating.desc(), MovieRating.reviews.desc())
+        .limit(limit)
+    )
+    return jsonify(movies=[m.to_dict() for m in movies], min_reviews=min_reviews)
+
+@app.route("/movies/rating")
+def movie_rating():
+    rating = db.get_or_404(MovieRating, normalize_movie(request.args.get("movie", "")))
+    return jsonify(rating.to_dict())
 
 
 # -----------------------------
@@ -147,8 +398,8 @@ def search():
 # -----------------------------
 @app.route("/users")
 def users_list():
-    users = User.query.all()
-    return render_template("users_list.html", users=users)
+    page = paginate(db.select(User).order_by(User.username))
+    return render_template("users_list.html", users=page.items, pagination=page)
 
 
 # -----------------------------
@@ -156,8 +407,10 @@ def users_list():
 # -----------------------------
 @app.route("/profile/<int:id>")
 def user_profile(id):
-    user = User.query.get_or_404(id)
-    return render_template("user_profile.html", user=user)
+    user = db.get_or_404(User, id)
+    # review.user is the profile's user, already in the session, so no query per review
+    page = paginate(db.select(Review).filter_by(user_id=id).order_by(Review.id.desc()))
+    return render_template("user_profile.html", user=user, reviews=page.items, pagination=page)
 
 
 # -----------------------------
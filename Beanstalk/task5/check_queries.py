@@ -0,0 +1,85 @@
+"""Query-count check: renders each listing page against a small and a large
+scratch database and fails if any page issues more SQL statements than its
+budget, or more on the large database than on the small one (an N+1).
+
+    python check_queries.py
+
+Uses stand-in templates that touch the same attributes as the real ones
+(review.user.username on every review), so lazy loads show up as queries.
+"""
+import os
+import sys
+import tempfile
+
+# Point the app at a scratch database before it is imported
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'check.db')}"
+
+from jinja2 import ChoiceLoader, DictLoader  # noqa: E402
+from sqlalchemy import event, insert  # noqa: E402
+
+import app  # noqa: E402
+
+REVIEW_LIST = "{% for r in reviews %}{{ r.movie }} {{ r.rating }} {{ r.user.username }}\n{% endfor %}"
+TEMPLATES = {
+    "index.html": REVIEW_LIST,
+    "search_results.html": "{% for r in results %}{{ r.movie }} {{ r.username }}\n{% endfor %}",
+    "users_list.html": "{% for u in users %}{{ u.username }}\n{% endfor %}",
+    "user_profile.html": "{{ user.username }}\n" + REVIEW_LIST,
+    "view_review.html": "{{ review.movie }} {{ review.user.username }}",
+}
+
+# Statements per request, including the COUNT behind pagination
+BUDGET = {"/": 2, "/search?q=movie": 1, "/users": 2, "/profile/1": 3, "/review/1": 1}
+
+SIZES = (30, 3000)  # reviews; one user per 10 reviews
+
+def seed(reviews):
+    app.db.drop_all()
+    app.db.create_all()
+    users = max(1, reviews // 10)
+    app.db.session.execute(insert(app.User), [
+        {"id": i, "username": f"user{i}", "email": f"user{i}@example.com", "password": "x"}
+        for i in range(1, users + 1)
+    ])
+    app.db.session.execute(insert(app.Review), [
+        {"movie": f"Movie {i % 500}", "content": "...", "rating": i % 5 + 1, "user_id": i % users + 1}
+        for i in range(1, reviews + 1)
+    ])
+    app.db.session.commit()
+
+def count_queries(client, path):
+    statements = []
+
+    def on_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    engine = app.db.engine
+    event.listen(engine, "before_cursor_execute", on_execute)
+    try:
+        resp = client.get(path)
+    finally:
+        event.remove(engine, "before_cursor_execute", on_execute)
+    if resp.status_code != 200:
+        sys.exit(f"{path} returned {resp.status_code}")
+    return len(statements)
+
+def main():
+    app.app.jinja_loader = ChoiceLoader([DictLoader(TEMPLATES), app.app.jinja_loader])
+    client = app.app.test_client()
+    counts = {}
+    with app.app.app_context():
+        for size in SIZES:
+            seed(size)
+            counts[size] = {path: count_queries(client, path) for path in BUDGET}
+
+    failures = 0
+    for path, budget in BUDGET.items():
+        small, large = (counts[size][path] for size in SIZES)
+        ok = large <= budget and large == small
+        failures += not ok
+        print(f"{'ok  ' if ok else 'FAIL'} {path:18} {small} queries at {SIZES[0]} reviews, "
+              f"{large} at {SIZES[1]} (budget {budget})")
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,11 @@
 #!/bin/bash
 echo "Running DB migrations (db.create_all)"
 python3 - << 'EOF'
-from app import db, app
+from app import db, app, Review, MovieRating, rebuild_movie_ratings, upgrade_schema
 with app.app_context():
-    db.create_all()
+    upgrade_schema()
     print("Tables created successfully!")
+    # First deploy with movie_rating: backfill it from the existing reviews
+    if db.session.query(MovieRating).first() is None and db.session.query(Review).first() is not None:
+        print(f"Backfilled ratings for {rebuild_movie_ratings()} movies")
 EOF
@@ -1,12 +1,33 @@
+import csv
+import io
+import json
 import os
-from datetime import datetime
-from flask import Flask, request, render_template, flash, redirect, url_for, session
+import random
+import sys
+import threading
+import time
+import zlib
+from collections import Counter, OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from functools import wraps
+import click
+from flask import Flask, request, render_template, flash, redirect, url_for, session, g, jsonify, Response, abort, stream_with_context
+from flask import make_response
+from markupsafe import Markup
+from werkzeug.http import is_resource_modified
 from werkzeug.security import generate_password_hash, check_password_hash
-from sqlalchemy import create_engine, Column, Integer, String, TIMESTAMP, Boolean
+from sqlalchemy import create_engine, Column, Integer, String, TIMESTAMP, DateTime, Boolean, Index, event, select, insert, case
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 from sqlalchemy.orm import sessionmaker, scoped_session, declarative_base
 from sqlalchemy.sql import func
 from dotenv import load_dotenv
 
+try:
+    import redis
+except ImportError:  # optional: only needed for FRAGMENT_CACHE_REDIS_URL
+    redis = None
+
 # Load env
 load_dotenv()
 
@@ -15,6 +36,39 @@ DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///hostel.db")
 FLASK_SECRET = os.getenv("FLASK_SECRET", "dev-secret-change-me")
 ADMIN_EMAIL = os.getenv("ADMIN_EMAIL", "admin@hostel.com")
 ADMIN_PASSWORD = os.getenv("ADMIN_PASSWORD", "admin123")
+# Short-lived (id, role) cache per worker; set IDENTITY_CACHE_TTL=0 to disable
+IDENTITY_CACHE_TTL = float(os.getenv("IDENTITY_CACHE_TTL", 30))
+IDENTITY_CACHE_SIZE = int(os.getenv("IDENTITY_CACHE_SIZE", 1024))
+# Password hashing: algorithm is "pbkdf2:sha256" (cost = iterations) or "scrypt" (cost = N)
+PASSWORD_HASH_ALGORITHM = os.getenv("PASSWORD_HASH_ALGORITHM", "pbkdf2:sha256")
+PASSWORD_HASH_COST = int(os.getenv("PASSWORD_HASH_COST", 600000))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", os.cpu_count() or 2))
+PASSWORD_HASH_TIMEOUT = float(os.getenv("PASSWORD_HASH_TIMEOUT", 10))
+# Bulk import: rows without a password get this one (hashed once per import)
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", 1000))
+IMPORT_DEFAULT_PASSWORD = os.getenv("IMPORT_DEFAULT_PASSWORD", "student123")
+# A .json array is parsed whole, so it is capped; larger imports must use .ndjson
+IMPORT_JSON_MAX_BYTES = int(os.getenv("IMPORT_JSON_MAX_BYTES", 10 * 1024 * 1024))
+EXPORT_CHUNK_ROWS = int(os.getenv("EXPORT_CHUNK_ROWS", 1000))
+# Bulk fee updates: one transaction per chunk keeps row locks short
+BULK_CHUNK_SIZE = int(os.getenv("BULK_CHUNK_SIZE", 500))
+# Synthetic data: rows per multi-row INSERT/commit, students per room
+SEED_BATCH_SIZE = int(os.getenv("SEED_BATCH_SIZE", 5000))
+SEED_ROOM_CAPACITY = int(os.getenv("SEED_ROOM_CAPACITY", 3))
+# Dashboard summary: STATS_COUNTERS=1 reads totals from student_counters, which every
+# student write keeps in step; run `flask rebuild-counters` after turning it on
+STATS_COUNTERS = os.getenv("STATS_COUNTERS", "0") == "1"
+SUMMARY_ROOM_LIMIT = int(os.getenv("SUMMARY_ROOM_LIMIT", 100))
+# Startup: DB_INIT=lazy creates tables and the default admin on the first request,
+# DB_INIT=skip only waits for a one-shot `flask init-db` to have done it. Requests
+# wait up to DB_INIT_WAIT before getting a 503; failures retry with backoff.
+DB_INIT = os.getenv("DB_INIT", "lazy")
+DB_INIT_WAIT = float(os.getenv("DB_INIT_WAIT", 5))
+DB_INIT_BACKOFF_MAX = float(os.getenv("DB_INIT_BACKOFF_MAX", 60))
+# Rendered admin-table fragments; set FRAGMENT_CACHE_REDIS_URL to share them across workers
+FRAGMENT_CACHE_BYTES = int(os.getenv("FRAGMENT_CACHE_BYTES", 8 * 1024 * 1024))
+FRAGMENT_CACHE_REDIS_URL = os.getenv("FRAGMENT_CACHE_REDIS_URL", "")
+FRAGMENT_CACHE_TTL = int(os.getenv("FRAGMENT_CACHE_TTL", 300))
 
 # DB setup
 engine = create_engine(
@@ -25,9 +79,28 @@ engine = create_engine(
 SessionLocal = scoped_session(sessionmaker(bind=engine))
 Base = declarative_base()
 
+# Pool checkout/checkin counters; in_use must return to 0 once traffic stops
+POOL_STATS = {"checkouts": 0, "checkins": 0}
+_pool_stats_lock = threading.Lock()
+
+@event.listens_for(engine, "checkout")
+def _on_checkout(dbapi_conn, conn_record, conn_proxy):
+    with _pool_stats_lock:
+        POOL_STATS["checkouts"] += 1
+
+@event.listens_for(engine, "checkin")
+def _on_checkin(dbapi_conn, conn_record):
+    with _pool_stats_lock:
+        POOL_STATS["checkins"] += 1
+
 # Model
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        # Covering indexes for the dashboard summary: paid/unpaid totals and per-room occupancy
+        Index("ix_users_role_fees_paid", "role", "fees_paid"),
+        Index("ix_users_role_room_fees_paid", "role", "room", "fees_paid"),
+    )
 
     id = Column(Integer, primary_key=True)
     name = Column(String(255), nullable=False)
@@ -40,7 +113,21 @@ class User(Base):
     role = Column(String(20), default="student")  # admin or student
     created_at = Column(TIMESTAMP, server_default=func.now())
 
-Base.metadata.create_all(bind=engine)
+# Bumped in the same transaction as every write to student rows; drives ETags
+class TableVersion(Base):
+    __tablename__ = "table_versions"
+
+    name = Column(String(64), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, nullable=False)
+
+# Student and paid counts per room ("room:<room>") plus a "total" row; only kept with STATS_COUNTERS=1
+class StudentCounter(Base):
+    __tablename__ = "student_counters"
+
+    scope = Column(String(64), primary_key=True)
+    students = Column(Integer, nullable=False, default=0)
+    paid = Column(Integer, nullable=False, default=0)
 
 # App
 app = Flask(__name__, template_folder="templates", static_folder="static")
@@ -48,31 +135,107 @@ app.secret_key = FLASK_SECRET
 
 # Helpers
 def get_db():
-    db = SessionLocal()
+    # One session per request, shared by current_user() and the route
+    if "db" not in g:
+        g.db = SessionLocal()
+    return g.db
+
+@app.teardown_appcontext
+def close_db(exc):
+    db = g.pop("db", None)
+    if db is not None:
+        if exc is not None:
+            db.rollback()
+        db.close()
+    SessionLocal.remove()
+
+# Password hashing runs on the request thread, at most PASSWORD_HASH_WORKERS at
+# a time (hashlib releases the GIL). A login storm waits up to
+# PASSWORD_HASH_TIMEOUT for a slot and then gets a 503, instead of pinning every
+# worker thread.
+if PASSWORD_HASH_ALGORITHM == "scrypt":
+    PASSWORD_HASH_METHOD = f"scrypt:{PASSWORD_HASH_COST}:8:1"
+else:
+    PASSWORD_HASH_METHOD = f"{PASSWORD_HASH_ALGORITHM}:{PASSWORD_HASH_COST}"
+
+_hash_slots = threading.BoundedSemaphore(PASSWORD_HASH_WORKERS)
+
+class HashBusy(Exception):
+    pass
+
+def run_hash(fn, *args, timeout=PASSWORD_HASH_TIMEOUT, **kwargs):
+    if not _hash_slots.acquire(timeout=timeout):
+        raise HashBusy()
     try:
-        yield db
+        return fn(*args, **kwargs)
     finally:
-        db.close()
+        _hash_slots.release()
+
+def hash_password(password):
+    return run_hash(generate_password_hash, password, method=PASSWORD_HASH_METHOD)
+
+def verify_password(password_hash, password):
+    return run_hash(check_password_hash, password_hash, password)
+
+def needs_rehash(password_hash):
+    return password_hash.split("$", 1)[0] != PASSWORD_HASH_METHOD
+
+# Identity cache: user_id -> (expires_at, Identity), least recently used first
+Identity = namedtuple("Identity", ["id", "role"])
+_identity_cache = OrderedDict()
+_identity_lock = threading.Lock()
+
+def cache_identity(user):
+    if IDENTITY_CACHE_TTL <= 0:
+        return
+    with _identity_lock:
+        _identity_cache[user.id] = (time.monotonic() + IDENTITY_CACHE_TTL, Identity(user.id, user.role))
+        _identity_cache.move_to_end(user.id)
+        while len(_identity_cache) > IDENTITY_CACHE_SIZE:
+            _identity_cache.popitem(last=False)
+
+def invalidate_identity(uid):
+    with _identity_lock:
+        _identity_cache.pop(uid, None)
 
 def current_user():
+    # Full User row, loaded at most once per request
+    uid = session.get("user_id")
+    if not uid:
+        return None
+    if "user" not in g:
+        g.user = get_db().query(User).filter_by(id=uid).first()
+        if g.user:
+            cache_identity(g.user)
+    return g.user
+
+def current_identity():
+    # Just (id, role) for access checks; served from the cache when fresh
     uid = session.get("user_id")
     if not uid:
         return None
-    db = next(get_db())
-    user = db.query(User).filter_by(id=uid).first()
-    db.close()
-    return user
+    if "identity" not in g:
+        with _identity_lock:
+            entry = _identity_cache.get(uid)
+            if entry and entry[0] > time.monotonic():
+                _identity_cache.move_to_end(uid)
+                g.identity = entry[1]
+        if "identity" not in g:
+            user = current_user()
+            g.identity = Identity(user.id, user.role) if user else None
+    return g.identity
 
 def login_user(user):
     session["user_id"] = user.id
     session["role"] = user.role
+    cache_identity(user)
 
 def logout_user():
     session.pop("user_id", None)
     session.pop("role", None)
 
 def create_default_admin():
-    db = next(get_db())
+    db = get_db()
     admin = db.query(User).filter_by(role="admin").first()
     if not admin:
         admin_username = ADMIN_EMAIL.split("@")[0]
@@ -80,7 +243,7 @@ def create_default_admin():
             name="Admin",
             username=admin_username,
             email=ADMIN_EMAIL,
-            password_hash=generate_password_hash(ADMIN_PASSWORD),
+            password_hash=hash_password(ADMIN_PASSWORD),
             room=None,
             phone=None,
             fees_paid=True,
@@ -88,18 +251,313 @@ def create_default_admin():
         )
         db.add(admin_user)
         db.commit()
-    db.close()
 
-create_default_admin()
+# Dashboard summary
+def counter_scope(room):
+    return f"room:{room or ''}"
+
+def room_deltas(rows):
+    # (room, fees_paid) pairs -> {room: (students, paid)}
+    deltas = {}
+    for room, paid in rows:
+        students_delta, paid_delta = deltas.get(room, (0, 0))
+        deltas[room] = (students_delta + 1, paid_delta + bool(paid))
+    return deltas
+
+def adjust_student_counters(db, deltas):
+    # deltas is {room: (students, paid)}; call before commit, next to bump_students_version()
+    if not STATS_COUNTERS:
+        return
+    total = (sum(d[0] for d in deltas.values()), sum(d[1] for d in deltas.values()))
+    changes = [("total", total)] + [(counter_scope(room), d) for room, d in deltas.items()]
+    for scope, (students, paid) in changes:
+        if not (students or paid):
+            continue
+        increment = {StudentCounter.students: StudentCounter.students + students,
+                     StudentCounter.paid: StudentCounter.paid + paid}
+        if db.query(StudentCounter).filter_by(scope=scope).update(increment, synchronize_session=False):
+            continue
+        try:
+            # Savepoint: if a concurrent request inserted this row first, only the insert is undone
+            with db.begin_nested():
+                db.add(StudentCounter(scope=scope, students=students, paid=paid))
+        except IntegrityError:
+            db.query(StudentCounter).filter_by(scope=scope).update(increment, synchronize_session=False)
+
+def room_occupancy_query(db):
+    # Answered from ix_users_role_room_fees_paid without touching the table rows
+    paid = func.sum(case((User.fees_paid.is_(True), 1), else_=0))
+    return (
+        db.query(User.room, func.count(), paid)
+        .filter(User.role == "student")
+        .group_by(User.room)
+        .order_by(User.room)
+    )
+
+def rebuild_student_counters(db):
+    db.query(StudentCounter).delete()
+    rooms = room_occupancy_query(db).all()
+    db.add_all(StudentCounter(scope=counter_scope(room), students=n, paid=p or 0) for room, n, p in rooms)
+    db.add(StudentCounter(scope="total", students=sum(r[1] for r in rooms), paid=sum(r[2] or 0 for r in rooms)))
+    db.commit()
+    return len(rooms)
+
+def student_summary(db, room_limit=None):
+    if STATS_COUNTERS:
+        total = db.get(StudentCounter, "total")
+        students, paid = (total.students, total.paid) if total else (0, 0)
+        query = (
+            db.query(StudentCounter.scope, StudentCounter.students, StudentCounter.paid)
+            .filter(StudentCounter.scope.startswith("room:"), StudentCounter.students > 0)
+            .order_by(StudentCounter.scope)
+        )
+        rooms = [(scope[len("room:"):] or None, n, p) for scope, n, p in query.limit(room_limit)]
+    else:
+        by_paid = dict(
+            db.query(User.fees_paid, func.count())
+            .filter(User.role == "student")
+            .group_by(User.fees_paid)
+        )
+        students, paid = sum(by_paid.values()), by_paid.get(True, 0)
+        rooms = room_occupancy_query(db).limit(room_limit).all()
+    return {
+        "students": students,
+        "paid": paid,
+        "unpaid": students - paid,
+        "rooms": [{"room": room, "students": n, "paid": p or 0} for room, n, p in rooms],
+        "source": "counters" if STATS_COUNTERS else "group_by",
+    }
+
+def ensure_students_version():
+    db = get_db()
+    if db.get(TableVersion, "students") is None:
+        db.add(TableVersion(name="students", version=0, updated_at=datetime.utcnow().replace(microsecond=0)))
+        try:
+            db.commit()
+        except SQLAlchemyError:
+            db.rollback()  # another worker created it first
+
+def init_db():
+    Base.metadata.create_all(bind=engine)
+    # create_all() skips tables that already exist, so add newer indexes to them here
+    for index in User.__table__.indexes:
+        index.create(bind=engine, checkfirst=True)
+    create_default_admin()
+    ensure_students_version()
+    if STATS_COUNTERS and get_db().get(StudentCounter, "total") is None:
+        try:
+            rebuild_student_counters(get_db())
+        except SQLAlchemyError:
+            get_db().rollback()  # another worker built them first
+
+def check_db():
+    # DB_INIT=skip: the schema belongs to `flask init-db`; only confirm it has run
+    if get_db().get(TableVersion, "students") is None:
+        raise RuntimeError("database not initialised yet; run `flask init-db`")
+
+@app.cli.command("init-db")
+def init_db_command():
+    """Create tables, indexes and the default admin."""
+    init_db()
+    click.echo("Database initialised")
+
+# Startup
+# Nothing touches the database at import time. The first request starts the
+# init in a background thread; requests wait briefly for it and get a 503 while
+# it keeps retrying, so a slow database delays readiness instead of killing workers.
+NO_DB_ENDPOINTS = {"static"}
+
+_db_ready = threading.Event()
+_db_init_lock = threading.Lock()
+_db_init_thread = None
+
+class DatabaseStarting(Exception):
+    pass
+
+def init_db_with_backoff():
+    delay = 1
+    while True:
+        try:
+            with app.app_context():
+                if DB_INIT == "skip":
+                    check_db()
+                else:
+                    init_db()
+            _db_ready.set()
+            return
+        except Exception as e:
+            print(f"Database not ready ({e}), retrying in {delay}s")
+            time.sleep(delay)
+            delay = min(delay * 2, DB_INIT_BACKOFF_MAX)
+
+def start_db_init():
+    global _db_init_thread
+    with _db_init_lock:
+        if _db_init_thread is None:
+            _db_init_thread = threading.Thread(target=init_db_with_backoff, name="db-init", daemon=True)
+            _db_init_thread.start()
+
+def wait_for_db(timeout=None):
+    start_db_init()
+    return _db_ready.wait(timeout)
+
+@app.before_request
+def require_db():
+    if _db_ready.is_set() or request.endpoint in NO_DB_ENDPOINTS:
+        return
+    if not wait_for_db(DB_INIT_WAIT):
+        raise DatabaseStarting()
+
+@app.errorhandler(DatabaseStarting)
+def database_starting(e):
+    return ("Starting up, please retry shortly.", 503, {"Retry-After": "2"})
+
+# HTTP caching
+def bump_students_version(db):
+    # Call before commit so the version moves with the data it describes
+    db.query(TableVersion).filter_by(name="students").update(
+        {TableVersion.version: TableVersion.version + 1,
+         TableVersion.updated_at: datetime.utcnow().replace(microsecond=0)},
+        synchronize_session=False,
+    )
+    # Old fragments can no longer be hit (their key has the old version); free them now
+    fragment_cache.clear()
+
+def students_validators(user):
+    version, updated_at = (
+        get_db().query(TableVersion.version, TableVersion.updated_at).filter_by(name="students").one()
+    )
+    last_modified = updated_at.replace(tzinfo=timezone.utc)
+    g.students_version = f"{version}-{int(last_modified.timestamp())}"
+    # Pages are per user, and each page or search gets its own ETag
+    etag = (f"students-{version}-{int(last_modified.timestamp())}-u{user.id}-"
+            f"{zlib.crc32(request.query_string):08x}")
+    return etag, last_modified
+
+def conditional_on_students(view):
+    # Answer 304 from the version row alone, before the view queries or renders.
+    # For admin views: anyone else gets the view's redirect or 403, with no validators.
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        user = current_identity()
+        if not user or user.role != "admin":
+            return view(*args, **kwargs)
+        etag, last_modified = students_validators(user)
+        # A pending flash message still has to be shown
+        if "_flashes" not in session and not is_resource_modified(
+            request.environ, etag=etag, last_modified=last_modified
+        ):
+            response = make_response("", 304)
+        else:
+            response = make_response(view(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+        response.set_etag(etag, weak=True)
+        response.last_modified = last_modified
+        response.cache_control.private = True
+        response.cache_control.no_cache = True
+        return response
+    return wrapper
 
 @app.context_processor
 def inject_now():
     return {"now": datetime.utcnow}
 
+@app.errorhandler(HashBusy)
+def hash_pool_busy(e):
+    return ("Server is busy, please retry shortly.", 503, {"Retry-After": "2"})
+
+@app.route("/pool-stats")
+def pool_stats():
+    # Pool internals are for operators only
+    user = current_identity()
+    if not user or user.role != "admin":
+        return ("", 403)
+    with _pool_stats_lock:
+        stats = dict(POOL_STATS)
+    stats["in_use"] = stats["checkouts"] - stats["checkins"]
+    stats["pool"] = engine.pool.status()
+    return jsonify(stats)
+
+# Fragment cache
+class FragmentCache:
+    # LRU of rendered HTML bounded by total size, optionally backed by Redis.
+    # Keys carry the table version, so a write invalidates every worker's entries.
+    def __init__(self, max_bytes, shared=None, ttl=300):
+        self.max_bytes = max_bytes
+        self.shared = shared
+        self.ttl = ttl
+        self.stats = {"hit": 0, "miss": 0, "eviction": 0}
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def _count(self, event):
+        # Caller holds self._lock: += on a dict entry is not atomic across threads
+        self.stats[event] += 1
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self._count("hit")
+                return value
+        if self.shared is not None:
+            try:
+                raw = self.shared.get(key)
+            except redis.RedisError:
+                raw = None
+            if raw is not None:
+                value = raw.decode()
+                self._store(key, value)
+        with self._lock:
+            self._count("hit" if value is not None else "miss")
+        return value
+
+    def set(self, key, value):
+        self._store(key, value)
+        if self.shared is not None:
+            try:
+                self.shared.setex(key, self.ttl, value)
+            except redis.RedisError:
+                pass
+
+    def _store(self, key, value):
+        size = sys.getsizeof(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= sys.getsizeof(old)
+            self._entries[key] = value
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= sys.getsizeof(evicted)
+                self._count("eviction")
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+def make_fragment_cache():
+    shared = None
+    if FRAGMENT_CACHE_REDIS_URL:
+        if redis is None:
+            print("FRAGMENT_CACHE_REDIS_URL is set but redis is not installed; using the local cache only")
+        else:
+            shared = redis.Redis.from_url(FRAGMENT_CACHE_REDIS_URL, socket_timeout=0.2)
+    return FragmentCache(FRAGMENT_CACHE_BYTES, shared=shared, ttl=FRAGMENT_CACHE_TTL)
+
+fragment_cache = make_fragment_cache()
+
 # Routes
 @app.route("/")
 def home():
-    user = current_user()
+    user = current_identity()
     if not user:
         return redirect(url_for("login"))
     return redirect(url_for("admin_dashboard") if user.role == "admin" else url_for("dashboard"))
@@ -119,19 +577,18 @@ def register():
             flash("Please fill required fields", "danger")
             return redirect(url_for("register"))
 
-        db = next(get_db())
+        db = get_db()
 
         # Check duplicates
         if db.query(User).filter((User.username == username) | (User.email == email)).first():
             flash("Username or email already exists", "warning")
-            db.close()
             return redirect(url_for("register"))
 
         user = User(
             name=name,
             username=username,
             email=email,
-            password_hash=generate_password_hash(password),
+            password_hash=hash_password(password),
             room=room or None,
             phone=phone,
             fees_paid=False,
@@ -139,8 +596,9 @@ def register():
         )
 
         db.add(user)
+        adjust_student_counters(db, {user.room: (1, 0)})
+        bump_students_version(db)
         db.commit()
-        db.close()
 
         flash("Account created. Please login.", "success")
         return redirect(url_for("login"))
@@ -154,13 +612,16 @@ def login():
         username_or_email = request.form.get("username_or_email", "").strip()
         password = request.form.get("password", "")
 
-        db = next(get_db())
+        db = get_db()
         user = db.query(User).filter(
             (User.username == username_or_email) | (User.email == username_or_email)
         ).first()
-        db.close()
 
-        if user and check_password_hash(user.password_hash, password):
+        if user and verify_password(user.password_hash, password):
+            if needs_rehash(user.password_hash):
+                # Cost settings changed since this hash was made; upgrade it now
+                user.password_hash = hash_password(password)
+                db.commit()
             login_user(user)
             return redirect(url_for("admin_dashboard") if user.role == "admin" else url_for("dashboard"))
 
@@ -191,8 +652,8 @@ def profile():
     if not user:
         return redirect(url_for("login"))
 
-    db = next(get_db())
-    u = db.query(User).filter_by(id=user.id).first()
+    db = get_db()
+    u = user
 
     if request.method == "POST":
         u.name = request.form.get("name", u.name)
@@ -200,7 +661,6 @@ def profile():
 
         if phone and (not phone.isdigit() or len(phone) != 10):
             flash("Phone number must be exactly 10 digits.", "danger")
-            db.close()
             return redirect(url_for("profile"))
 
         u.phone = phone
@@ -208,31 +668,55 @@ def profile():
         if u.role == "admin":
             u.room = request.form.get("room", u.room)
 
+        bump_students_version(db)
         db.commit()
-        db.close()
+        invalidate_identity(u.id)
         flash("Profile updated successfully.", "success")
         return redirect(url_for("dashboard") if u.role == "student" else url_for("admin_dashboard"))
 
-    db.close()
     return render_template("profile.html", user=u)
 
 # Admin dashboard
 @app.route("/admin")
+@conditional_on_students
 def admin_dashboard():
-    user = current_user()
+    user = current_identity()
     if not user or user.role != "admin":
         return redirect(url_for("login"))
 
-    db = next(get_db())
-    students = db.query(User).filter(User.role == "student").order_by(User.created_at.asc()).all()
-    db.close()
+    key = f"hostel:admin-students:{g.students_version}"
+    table_html = fragment_cache.get(key)
+    if table_html is None:
+        db = get_db()
+        students = db.query(User).filter(User.role == "student").order_by(User.created_at.asc()).all()
+        table_html = render_template("_admin_students_table.html", students=students)
+        fragment_cache.set(key, table_html)
+
+    summary = student_summary(get_db(), room_limit=SUMMARY_ROOM_LIMIT + 1)
+    more_rooms = len(summary["rooms"]) > SUMMARY_ROOM_LIMIT
+    summary["rooms"] = summary["rooms"][:SUMMARY_ROOM_LIMIT]
+    return render_template("admin_dashboard.html", table_html=Markup(table_html), summary=summary,
+                           more_rooms=more_rooms)
+
+# Admin summary stats
+@app.route("/admin/summary")
+@conditional_on_students
+def admin_summary():
+    user = current_identity()
+    if not user or user.role != "admin":
+        return ("", 403)
+    return jsonify(student_summary(get_db()))
 
-    return render_template("admin_dashboard.html", students=students)
+@app.cli.command("rebuild-counters")
+def rebuild_counters_command():
+    """Recompute student_counters from the users table."""
+    rooms = rebuild_student_counters(get_db())
+    click.echo(f"Rebuilt counters for {rooms} rooms")
 
 # Admin add student
 @app.route("/admin/add", methods=["GET", "POST"])
 def admin_add_student():
-    user = current_user()
+    user = current_identity()
     if not user or user.role != "admin":
         return redirect(url_for("login"))
 
@@ -252,18 +736,17 @@ def admin_add_student():
             flash("Phone number must be exactly 10 digits.", "danger")
             return redirect(url_for("admin_add_student"))
 
-        db = next(get_db())
+        db = get_db()
 
         if db.query(User).filter((User.username == username) | (User.email == email)).first():
             flash("Username or email already exists.", "warning")
-            db.close()
             return redirect(url_for("admin_add_student"))
 
         student = User(
             name=name,
             username=username,
             email=email,
-            password_hash=generate_password_hash(password),
+            password_hash=hash_password(password),
             room=room or None,
             phone=phone,
             fees_paid=False,
@@ -271,8 +754,9 @@ def admin_add_student():
         )
 
         db.add(student)
+        adjust_student_counters(db, {student.room: (1, 0)})
+        bump_students_version(db)
         db.commit()
-        db.close()
 
         flash("Student added successfully.", "success")
         return redirect(url_for("admin_dashboard"))
@@ -282,74 +766,482 @@ def admin_add_student():
 # Admin edit student
 @app.route("/admin/edit/<int:uid>", methods=["GET", "POST"])
 def admin_edit_student(uid):
-    user = current_user()
+    user = current_identity()
     if not user or user.role != "admin":
         return redirect(url_for("login"))
 
-    db = next(get_db())
+    db = get_db()
     student = db.query(User).filter_by(id=uid, role="student").first()
 
     if not student:
-        db.close()
         flash("Student not found", "warning")
         return redirect(url_for("admin_dashboard"))
 
     if request.method == "POST":
+        old_room = student.room
         student.name = request.form.get("name", student.name)
         student.room = request.form.get("room", student.room)
         phone = request.form.get("phone", student.phone)
 
         if phone and (not phone.isdigit() or len(phone) != 10):
             flash("Phone number must be exactly 10 digits.", "danger")
-            db.close()
             return redirect(url_for("admin_edit_student", uid=uid))
 
         student.phone = phone
 
+        if counter_scope(student.room) != counter_scope(old_room):
+            paid = int(bool(student.fees_paid))
+            adjust_student_counters(db, {old_room: (-1, -paid), student.room: (1, paid)})
+        bump_students_version(db)
         db.commit()
-        db.close()
+        invalidate_identity(uid)
         flash("Student updated successfully.", "success")
         return redirect(url_for("admin_dashboard"))
 
-    db.close()
     return render_template("add_edit_student.html", action="Edit", student=student)
 
 # Admin mark paid
 @app.route("/admin/mark_paid/<int:uid>", methods=["POST"])
 def admin_mark_paid(uid):
-    user = current_user()
+    user = current_identity()
     if not user or user.role != "admin":
         return ("", 403)
 
-    db = next(get_db())
+    db = get_db()
     student = db.query(User).filter_by(id=uid, role="student").first()
 
     if student:
+        if not student.fees_paid:
+            adjust_student_counters(db, {student.room: (0, 1)})
         student.fees_paid = True
+        bump_students_version(db)
         db.commit()
 
-    db.close()
     flash("Marked fees as paid", "success")
     return redirect(url_for("admin_dashboard"))
 
+def mark_paid_chunk(db, ids):
+    unpaid = (User.id.in_(ids), User.role == "student", User.fees_paid.is_(False))
+    if STATS_COUNTERS:
+        # Lock the rows first so the per-room deltas match exactly what the UPDATE changes
+        rooms = Counter(room for (room,) in db.query(User.room).filter(*unpaid).with_for_update())
+        adjust_student_counters(db, {room: (0, n) for room, n in rooms.items()})
+    updated = db.query(User).filter(*unpaid).update({User.fees_paid: True}, synchronize_session=False)
+    if updated:
+        bump_students_version(db)
+    db.commit()
+    return updated
+
+def bulk_mark_paid(db, ids=None, room_prefix=None):
+    # Returns (matched, updated): students found, and those of them that were still unpaid
+    matched = updated = 0
+    if ids:
+        for i in range(0, len(ids), BULK_CHUNK_SIZE):
+            chunk = ids[i:i + BULK_CHUNK_SIZE]
+            matched += db.query(func.count(User.id)).filter(User.id.in_(chunk), User.role == "student").scalar()
+            updated += mark_paid_chunk(db, chunk)
+    elif room_prefix:
+        # Walk unpaid students in the rooms by id so each chunk is a short transaction
+        last_id = 0
+        while True:
+            chunk = [uid for (uid,) in (
+                db.query(User.id)
+                .filter(User.role == "student", User.fees_paid.is_(False), User.id > last_id,
+                        User.room.startswith(room_prefix, autoescape=True))
+                .order_by(User.id)
+                .limit(BULK_CHUNK_SIZE)
+            )]
+            if not chunk:
+                break
+            matched += len(chunk)
+            updated += mark_paid_chunk(db, chunk)
+            last_id = chunk[-1]
+    return matched, updated
+
+# Admin bulk mark paid
+def bulk_pay_params():
+    # Returns (ids, room_prefix) from a form or a JSON object; ValueError if malformed
+    if not request.is_json:
+        try:
+            ids = {int(i) for i in request.form.getlist("ids")}
+        except ValueError:
+            raise ValueError("ids must be integers")
+        return sorted(ids), request.form.get("room_prefix", "").strip()
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        raise ValueError("expected a JSON object with ids or room_prefix")
+    ids, room_prefix = data.get("ids") or [], data.get("room_prefix") or ""
+    if not isinstance(ids, list) or not all(type(i) is int for i in ids):
+        raise ValueError("ids must be a list of integers")
+    if not isinstance(room_prefix, str):
+        raise ValueError("room_prefix must be a string")
+    return sorted(set(ids)), room_prefix.strip()
+
+@app.route("/admin/mark_paid", methods=["POST"])
+def admin_bulk_mark_paid():
+    user = current_identity()
+    if not user or user.role != "admin":
+        return ("", 403)
+
+    wants_json = request.is_json or request.args.get("format") == "json"
+
+    try:
+        ids, room_prefix = bulk_pay_params()
+        if not (ids or room_prefix):
+            raise ValueError("Select students or give a room prefix.")
+    except ValueError as e:
+        if wants_json:
+            return jsonify(error=str(e)), 400
+        flash(str(e), "warning")
+        return redirect(url_for("admin_dashboard"))
+
+    matched, updated = bulk_mark_paid(get_db(), ids=ids, room_prefix=room_prefix)
+
+    if wants_json:
+        return jsonify(matched=matched, updated=updated)
+    not_found = len(ids) - matched if ids else 0
+    flash(f"Marked {updated} students as paid ({matched - updated} already paid, {not_found} not found).", "success")
+    return redirect(url_for("admin_dashboard"))
+
 # Admin delete student
 @app.route("/admin/delete/<int:uid>", methods=["POST"])
 def admin_delete(uid):
-    user = current_user()
+    user = current_identity()
     if not user or user.role != "admin":
         return ("", 403)
 
-    db = next(get_db())
+    db = get_db()
     student = db.query(User).filter_by(id=uid, role="student").first()
 
     if student:
         db.delete(student)
+        adjust_student_counters(db, {student.room: (-1, -int(bool(student.fees_paid)))})
+        bump_students_version(db)
         db.commit()
+        invalidate_identity(uid)
 
-    db.close()
     flash("Student removed", "info")
     return redirect(url_for("admin_dashboard"))
 
+# Bulk import
+def read_import_rows(stream, filename):
+    # Yield (row, error) per row of a CSV, JSON-lines or JSON-array file. Rows are
+    # committed in batches as they stream in, so a row that cannot be parsed is
+    # reported like any other rejected row instead of aborting the import.
+    name = filename.lower()
+    if name.endswith(".json"):
+        data = stream.read(IMPORT_JSON_MAX_BYTES + 1)
+        if len(data) > IMPORT_JSON_MAX_BYTES:
+            raise ValueError(f".json files are limited to {IMPORT_JSON_MAX_BYTES // (1024 * 1024)} MB; "
+                             "use .ndjson (one object per line) for larger imports")
+        rows = json.loads(data.decode("utf-8-sig"))
+        if not isinstance(rows, list):
+            raise ValueError("expected a JSON array of objects")
+        for row in rows:
+            yield row, None
+        return
+    if not name.endswith((".csv", ".ndjson", ".jsonl")):
+        raise ValueError("expected a .csv, .json or .ndjson file")
+
+    # Decoded line by line, so invalid UTF-8 costs one row (marked with U+FFFD), not the file
+    lines = (line.decode("utf-8-sig" if i == 0 else "utf-8", errors="replace") for i, line in enumerate(stream))
+    try:
+        if name.endswith(".csv"):
+            for row in csv.DictReader(lines):
+                if "\ufffd" in "".join(map(str, row.values())):
+                    yield None, "invalid UTF-8"
+                else:
+                    yield row, None
+        else:
+            for line in lines:
+                if not line.strip():
+                    continue
+                if "\ufffd" in line:
+                    yield None, "invalid UTF-8"
+                    continue
+                try:
+                    yield json.loads(line), None
+                except ValueError as e:
+                    yield None, f"invalid JSON: {e}"
+    except csv.Error as e:
+        # The CSV reader cannot resynchronise after this; earlier rows stay imported
+        yield None, f"file unreadable from this row on, remaining rows skipped: {e}"
+
+def validate_import_row(row):
+    # Same rules as admin_add_student, except the password may be left out
+    if not isinstance(row, dict):
+        return None, "expected an object with name, username and email"
+    record = {
+        "name": str(row.get("name") or "").strip(),
+        "username": str(row.get("username") or "").strip(),
+        "email": str(row.get("email") or "").strip().lower(),
+        "password": str(row.get("password") or "").strip(),
+        "room": str(row.get("room") or "").strip() or None,
+        "phone": str(row.get("phone") or "").strip() or None,
+    }
+    if not (record["name"] and record["username"] and record["email"]):
+        return None, "name, username and email are required"
+    if record["phone"] and (not record["phone"].isdigit() or len(record["phone"]) != 10):
+        return None, "phone number must be exactly 10 digits"
+    return record, None
+
+def insert_student_batch(db, batch, default_hash, errors):
+    usernames = [record["username"] for _, record in batch]
+    emails = [record["email"] for _, record in batch]
+    taken_usernames = {u for (u,) in db.query(User.username).filter(User.username.in_(usernames))}
+    taken_emails = {e for (e,) in db.query(User.email).filter(User.email.in_(emails))}
+
+    rows, lines = [], []
+    for line, record in batch:
+        if record["username"] in taken_usernames:
+            errors.append({"row": line, "error": f"username {record['username']} already exists"})
+        elif record["email"] in taken_emails:
+            errors.append({"row": line, "error": f"email {record['email']} already exists"})
+        else:
+            rows.append(record)
+            lines.append(line)
+    if not rows:
+        return 0
+
+    # Explicit passwords are hashed in parallel, each holding a hash slot like a
+    # login does; no timeout here since a large batch legitimately takes a while.
+    explicit = [record for record in rows if record["password"]]
+    with ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="pwhash") as pool:
+        hashes = list(pool.map(
+            lambda record: run_hash(
+                generate_password_hash, record["password"], method=PASSWORD_HASH_METHOD, timeout=None
+            ),
+            explicit,
+        ))
+    for record, password_hash in zip(explicit, hashes):
+        record["password_hash"] = password_hash
+
+    mappings = [
+        {
+            "name": record["name"],
+            "username": record["username"],
+            "email": record["email"],
+            "password_hash": record.get("password_hash", default_hash),
+            "room": record["room"],
+            "phone": record["phone"],
+            "fees_paid": False,
+            "role": "student",
+        }
+        for record in rows
+    ]
+    try:
+        db.bulk_insert_mappings(User, mappings)
+        adjust_student_counters(db, room_deltas((m["room"], False) for m in mappings))
+        bump_students_version(db)
+        db.commit()
+    except SQLAlchemyError as e:
+        db.rollback()
+        # Rows already reported as duplicates above keep their own error
+        errors.extend({"row": line, "error": f"batch rejected: {e.__class__.__name__}"} for line in lines)
+        return 0
+    return len(rows)
+
+def bulk_insert_students(rows):
+    db = get_db()
+    default_hash = hash_password(IMPORT_DEFAULT_PASSWORD)
+    inserted, errors = 0, []
+    seen_usernames, seen_emails = set(), set()
+    batch = []
+    for line, (row, error) in enumerate(rows, start=1):
+        record = None
+        if not error:
+            record, error = validate_import_row(row)
+        if record and record["username"] in seen_usernames:
+            error = f"username {record['username']} appears more than once"
+        elif record and record["email"] in seen_emails:
+            error = f"email {record['email']} appears more than once"
+        if error:
+            errors.append({"row": line, "error": error})
+            continue
+        seen_usernames.add(record["username"])
+        seen_emails.add(record["email"])
+        batch.append((line, record))
+        if len(batch) >= IMPORT_BATCH_SIZE:
+            inserted += insert_student_batch(db, batch, default_hash, errors)
+            batch = []
+    if batch:
+        inserted += insert_student_batch(db, batch, default_hash, errors)
+    errors.sort(key=lambda e: e["row"])
+    return inserted, errors
+
+# Admin import students
+@app.route("/admin/import", methods=["GET", "POST"])
+def admin_import_students():
+    user = current_identity()
+    if not user or user.role != "admin":
+        return redirect(url_for("login"))
+
+    if request.method == "POST":
+        upload = request.files.get("file")
+        if not upload or not upload.filename:
+            flash("Choose a CSV or JSON file to import.", "danger")
+            return redirect(url_for("admin_import_students"))
+        try:
+            inserted, errors = bulk_insert_students(read_import_rows(upload.stream, upload.filename))
+        except ValueError as e:
+            flash(f"Could not read {upload.filename}: {e}", "danger")
+            return redirect(url_for("admin_import_students"))
+
+        if request.args.get("format") == "json":
+            return jsonify(inserted=inserted, errors=errors)
+        flash(f"Imported {inserted} students, {len(errors)} rows rejected.", "warning" if errors else "success")
+        return render_template("import_students.html", errors=errors)
+
+    return render_template("import_students.html", errors=None)
+
+@app.cli.command("import-students")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+def import_students_command(path):
+    """Bulk-import students from a CSV, JSON or NDJSON file."""
+    with open(path, "rb") as f:
+        try:
+            inserted, errors = bulk_insert_students(read_import_rows(f, path))
+        except ValueError as e:
+            # Unsupported extension, oversized or malformed .json: nothing was imported
+            click.echo(f"Could not read {path}: {e}", err=True)
+            sys.exit(1)
+    for error in errors:
+        click.echo(f"row {error['row']}: {error['error']}", err=True)
+    click.echo(f"Imported {inserted} students, {len(errors)} rows rejected")
+
+# Synthetic data
+SEED_FIRST = ("Aarav", "Vivaan", "Aditya", "Ishaan", "Arjun", "Kabir", "Rohan", "Dev", "Karan", "Rahul",
+              "Diya", "Ananya", "Saanvi", "Meera", "Riya", "Isha", "Priya", "Neha", "Kavya", "Pooja")
+SEED_LAST = ("Sharma", "Verma", "Gupta", "Mathur", "Iyer", "Reddy", "Nair", "Khan", "Singh", "Das",
+             "Patel", "Joshi", "Mehta", "Rao", "Bose", "Kulkarni", "Menon", "Pillai", "Chopra", "Malhotra")
+
+def synthetic_room(n):
+    # Rooms fill SEED_ROOM_CAPACITY at a time: blocks A-Z, 10 floors of 40 rooms, then A2-Z2, ...
+    room = n // SEED_ROOM_CAPACITY
+    block, rest = divmod(room, 400)
+    label = chr(ord("A") + block % 26) + (str(block // 26 + 1) if block >= 26 else "")
+    return f"{label}-{rest // 40 + 1}{rest % 40 + 1:02d}"
+
+def synthetic_students(count, start=1, seed=42, password_hash=""):
+    # Deterministic student rows spread over the past year; `start` keeps usernames and emails unique
+    rnd = random.Random(seed)
+    now = datetime.utcnow().replace(microsecond=0)
+    for n in range(start, start + count):
+        first, last = rnd.choice(SEED_FIRST), rnd.choice(SEED_LAST)
+        handle = f"{first}.{last}{n}".lower()
+        yield {
+            "name": f"{first} {last}",
+            "username": handle,
+            "email": f"{handle}@hostel.edu",
+            "password_hash": password_hash,
+            "room": synthetic_room(n - 1),
+            "phone": f"{rnd.randint(6, 9)}{rnd.randint(0, 999999999):09d}",
+            "fees_paid": rnd.random() < 0.7,
+            "role": "student",
+            "created_at": now - timedelta(seconds=rnd.randint(0, 365 * 24 * 3600)),
+        }
+
+def seed_students(count, start=None, seed=42, batch_size=SEED_BATCH_SIZE):
+    db = get_db()
+    if start is None:
+        start = (db.query(func.max(User.id)).scalar() or 0) + 1
+    # Every seeded student gets IMPORT_DEFAULT_PASSWORD, hashed once
+    rows = synthetic_students(count, start, seed, hash_password(IMPORT_DEFAULT_PASSWORD))
+    inserted = 0
+    try:
+        while inserted < count:
+            batch = [row for _, row in zip(range(batch_size), rows)]
+            # One multi-row INSERT and one commit per batch
+            db.execute(insert(User), batch)
+            adjust_student_counters(db, room_deltas((r["room"], r["fees_paid"]) for r in batch))
+            inserted += len(batch)
+            # Each committed batch is visible to readers, so it must move the version too
+            bump_students_version(db)
+            db.commit()
+    except SQLAlchemyError:
+        db.rollback()
+        raise
+    return inserted
+
+@app.cli.command("seed-students")
+@click.argument("count", type=click.IntRange(min=1))
+@click.option("--start", type=int, default=None, help="Suffix for the first username (default: after the current max id).")
+@click.option("--seed", type=int, default=42, show_default=True, help="Random seed; same seed, same rows.")
+@click.option("--batch-size", type=click.IntRange(min=1), default=SEED_BATCH_SIZE, show_default=True)
+def seed_students_command(count, start, seed, batch_size):
+    """Insert COUNT synthetic student accounts for load and sizing tests."""
+    started = time.perf_counter()
+    try:
+        inserted = seed_students(count, start, seed, batch_size)
+    except SQLAlchemyError as e:
+        raise click.ClickException(f"{getattr(e, 'orig', e)}; choose another --start")
+    elapsed = time.perf_counter() - started
+    click.echo(f"Seeded {inserted} students in {elapsed:.1f}s ({inserted / elapsed:.0f} rows/s)")
+
+# Export
+EXPORT_COLUMNS = (User.id, User.name, User.username, User.email, User.room, User.phone, User.fees_paid, User.created_at)
+EXPORT_FIELDS = tuple(c.key for c in EXPORT_COLUMNS)
+
+def export_filters():
+    filters = [User.role == "student"]
+    fees_paid = request.args.get("fees_paid", "").strip().lower()
+    if fees_paid:
+        if fees_paid not in ("1", "0", "true", "false", "yes", "no"):
+            abort(400, "fees_paid must be true or false")
+        filters.append(User.fees_paid == (fees_paid in ("1", "true", "yes")))
+    room = request.args.get("room", "").strip()
+    if room:
+        filters.append(User.room == room)
+    return filters
+
+def iter_export_chunks(filters):
+    # Own connection rather than the request session: the body is produced after
+    # the view returns. yield_per turns on server-side cursors where the driver
+    # has them, so only one chunk of rows is held in memory at a time.
+    query = select(*EXPORT_COLUMNS).where(*filters).order_by(User.id)
+    with engine.connect() as conn:
+        result = conn.execution_options(yield_per=EXPORT_CHUNK_ROWS).execute(query)
+        for rows in result.partitions():
+            yield rows
+
+def export_value(value):
+    return value.isoformat(sep=" ") if isinstance(value, datetime) else value
+
+def csv_chunks(chunks):
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(EXPORT_FIELDS)
+    for rows in chunks:
+        writer.writerows([export_value(v) for v in row] for row in rows)
+        yield buf.getvalue()
+        buf.seek(0)
+        buf.truncate()
+    yield buf.getvalue()
+
+def ndjson_chunks(chunks):
+    for rows in chunks:
+        yield "".join(
+            json.dumps(dict(zip(EXPORT_FIELDS, map(export_value, row)))) + "\n" for row in rows
+        )
+
+# Admin export students
+@app.route("/students/export.<fmt>")
+def export_students(fmt):
+    user = current_identity()
+    if not user or user.role != "admin":
+        return ("", 403)
+
+    if fmt == "csv":
+        writer, mimetype = csv_chunks, "text/csv"
+    elif fmt == "ndjson":
+        writer, mimetype = ndjson_chunks, "application/x-ndjson"
+    else:
+        abort(404)
+
+    body = stream_with_context(writer(iter_export_chunks(export_filters())))
+    return Response(body, mimetype=mimetype,
+                    headers={"Content-Disposition": f"attachment; filename=students.{fmt}"})
+
 # Run
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=int(os.getenv("PORT", 5000)), debug=True)
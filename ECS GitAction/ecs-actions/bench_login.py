@@ -0,0 +1,53 @@
+"""Login benchmark: drives POST /login concurrently and reports logins/sec per core.
+
+    python bench_login.py
+    PASSWORD_HASH_COST=300000 BENCH_THREADS=16 python bench_login.py
+"""
+import os
+import tempfile
+import threading
+import time
+
+N_LOGINS = int(os.getenv("BENCH_LOGINS", 200))
+N_THREADS = int(os.getenv("BENCH_THREADS", 8))
+
+# Point the app at a scratch database before it is imported
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+
+import app  # noqa: E402
+
+def cores():
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+def worker(count, failures):
+    client = app.app.test_client()
+    for _ in range(count):
+        resp = client.post("/login", data={"username_or_email": app.ADMIN_EMAIL, "password": app.ADMIN_PASSWORD})
+        if resp.status_code != 302 or "/admin" not in resp.headers.get("Location", ""):
+            failures.append(resp.status_code)
+
+def main():
+    # Tables and the admin user are created on first use; do that before timing
+    app.wait_for_db()
+    per_thread = max(1, N_LOGINS // N_THREADS)
+    failures = []
+    threads = [threading.Thread(target=worker, args=(per_thread, failures)) for _ in range(N_THREADS)]
+
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    total = per_thread * N_THREADS
+    rate = total / elapsed
+    print(f"method={app.PASSWORD_HASH_METHOD} hash_workers={app.PASSWORD_HASH_WORKERS} threads={N_THREADS}")
+    print(f"{total} logins in {elapsed:.2f}s: {rate:.1f} logins/s, {rate / cores():.1f} logins/s/core "
+          f"({cores()} cores, {len(failures)} failures)")
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,32 @@
 import time
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
+import base64
+import csv
+import io
+import json
 import os
-from flask import Flask, request, render_template, flash, url_for, redirect
+import random
+import re
+import sys
+import threading
+import zlib
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as PingTimeout
+from functools import wraps
+from itertools import chain
+import click
+from flask import Flask, request, render_template, flash, url_for, redirect, jsonify, Response, abort, stream_with_context
+from flask import make_response, session, g
+from markupsafe import Markup
 import mysql.connector
 from mysql.connector import pooling, IntegrityError
 from dotenv import load_dotenv
+from werkzeug.http import is_resource_modified
+
+try:
+    import redis
+except ImportError:  # optional: only needed for FRAGMENT_CACHE_REDIS_URL
+    redis = None
 
 # Load .env
 load_dotenv()
@@ -18,41 +40,201 @@ DB_CONFIG = {
     "ssl_disabled": True
 }
 
-# Create connection pool
+# Create connection pool: one connection per request thread (WEB_THREADS) plus one
+# spare, unless DB_POOL_SIZE says otherwise. mysql.connector caps a pool at 32.
 POOL_NAME = "hostel_pool"
-POOL_SIZE = 5
+WEB_THREADS = int(os.getenv("WEB_THREADS", 4))
+POOL_SIZE = min(int(os.getenv("DB_POOL_SIZE", 0)) or WEB_THREADS + 1, pooling.CNX_POOL_MAXSIZE)
+# How long a request waits for a free connection before getting a 503
+POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 5))
+POOL_RETRY_AFTER = int(os.getenv("DB_POOL_RETRY_AFTER", 2))
 
-try:
-    cnxpool = pooling.MySQLConnectionPool(pool_name=POOL_NAME, pool_size=POOL_SIZE, **DB_CONFIG)
-except mysql.connector.Error as e:
-    raise SystemExit(f"Failed to initialize MySQL pool: {e}")
+# Pagination
+PAGE_SIZE = int(os.getenv("PAGE_SIZE", 50))
+MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", 200))
+
+# Search: InnoDB skips FULLTEXT tokens shorter than innodb_ft_min_token_size
+FT_MIN_TOKEN = int(os.getenv("FT_MIN_TOKEN", 3))
+FULLTEXT_ENABLED = True  # switched off by init_db() if the index could not be built
+
+# Schema migrations: concurrent workers/pods wait up to this long for the one applying them
+MIGRATION_LOCK_TIMEOUT = int(os.getenv("MIGRATION_LOCK_TIMEOUT", 300))
+# EXPLAIN checks only flag full scans once the optimizer estimates at least this many rows
+PLAN_CHECK_MIN_ROWS = int(os.getenv("PLAN_CHECK_MIN_ROWS", 1000))
+
+# Startup: DB_INIT=lazy applies migrations on the first request, DB_INIT=skip only
+# waits for a one-shot `flask db-migrate` (e.g. a Kubernetes Job) to have run them.
+# Requests wait up to DB_INIT_WAIT for that before getting a 503; failed attempts
+# are retried in the background with exponential backoff up to DB_INIT_BACKOFF_MAX.
+DB_INIT = os.getenv("DB_INIT", "lazy")
+DB_INIT_WAIT = float(os.getenv("DB_INIT_WAIT", 5))
+DB_INIT_BACKOFF_MAX = float(os.getenv("DB_INIT_BACKOFF_MAX", 60))
+
+# Readiness: /readyz pings the database at most once per READY_CACHE_TTL seconds
+# and reports not ready if the ping takes longer than READY_TIMEOUT
+READY_CACHE_TTL = float(os.getenv("READY_CACHE_TTL", 5))
+READY_TIMEOUT = float(os.getenv("READY_TIMEOUT", 2))
+
+# Bulk import
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", 1000))
+# A .json array is parsed whole, so it is capped; larger imports must use .ndjson
+IMPORT_JSON_MAX_BYTES = int(os.getenv("IMPORT_JSON_MAX_BYTES", 10 * 1024 * 1024))
+
+# Export
+EXPORT_COLUMNS = ("id", "name", "room", "phone", "email", "fees_paid", "created_at")
+EXPORT_CHUNK_ROWS = int(os.getenv("EXPORT_CHUNK_ROWS", 1000))
+
+# Bulk fee updates: one transaction per chunk keeps row locks short
+BULK_CHUNK_SIZE = int(os.getenv("BULK_CHUNK_SIZE", 500))
+
+# Synthetic data: rows per multi-row INSERT/commit, students per room
+SEED_BATCH_SIZE = int(os.getenv("SEED_BATCH_SIZE", 5000))
+SEED_ROOM_CAPACITY = int(os.getenv("SEED_ROOM_CAPACITY", 3))
+
+# Rendered student-table fragments; set FRAGMENT_CACHE_REDIS_URL to share them across workers
+FRAGMENT_CACHE_BYTES = int(os.getenv("FRAGMENT_CACHE_BYTES", 8 * 1024 * 1024))
+FRAGMENT_CACHE_REDIS_URL = os.getenv("FRAGMENT_CACHE_REDIS_URL", "")
+FRAGMENT_CACHE_TTL = int(os.getenv("FRAGMENT_CACHE_TTL", 300))
+
+# Created on first use so importing the app (gunicorn boot, flask CLI) needs no database
+cnxpool = None
+_cnxpool_lock = threading.Lock()
+
+def get_pool():
+    global cnxpool
+    if cnxpool is None:
+        with _cnxpool_lock:
+            if cnxpool is None:
+                cnxpool = pooling.MySQLConnectionPool(pool_name=POOL_NAME, pool_size=POOL_SIZE, **DB_CONFIG)
+    return cnxpool
 
 app = Flask(__name__)
 app.secret_key = os.getenv("FLASK_SECRET", "dev-secret-change-me")
 
 
-def get_conn():
-    return cnxpool.get_connection()
+# mysql.connector raises PoolError as soon as the pool is empty; waiting on a
+# semaphore sized to the pool turns that into a queue with a timeout.
+_pool_slots = threading.BoundedSemaphore(POOL_SIZE)
+
+class PoolTimeout(Exception):
+    pass
+
+class PooledConn:
+    def __init__(self, conn):
+        self._conn = conn
+        self._holds_slot = True
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+    def close(self):
+        try:
+            self._conn.close()
+        finally:
+            if self._holds_slot:
+                self._holds_slot = False
+                _pool_slots.release()
+
+def get_conn(timeout=POOL_TIMEOUT):
+    if not _pool_slots.acquire(timeout=timeout):
+        raise PoolTimeout(f"no database connection free after {timeout}s")
+    try:
+        return PooledConn(get_pool().get_connection())
+    except Exception:
+        _pool_slots.release()
+        raise
+
+@app.errorhandler(PoolTimeout)
+def pool_saturated(e):
+    return "Server busy, please retry shortly.", 503, {"Retry-After": str(POOL_RETRY_AFTER)}
 
 @app.context_processor
 def inject_now():
     return {"now": datetime.utcnow}
 
-def init_db_with_retry(retries=5, delay=10):
-    for i in range(retries):
-        try:
-            init_db()
-            return
-        except Exception as e:
-            print(f"DB init failed ({i+1}/{retries}): {e}")
-            time.sleep(delay)
-    raise SystemExit("Could not initialize DB after retries")
-# ✅ Auto-create database tables
-def init_db():
-    conn = get_conn()
-    cursor = conn.cursor()
+# ----------------- Pagination helpers -----------------
+# Keyset cursors encode the (created_at, id) of the boundary row so every page
+# is a single index range scan, no matter how deep the user pages.
+def encode_cursor(row):
+    raw = f"{row['created_at'].isoformat()}|{row['id']}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(token):
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)).decode()
+        created_at, sid = raw.split("|", 1)
+        return datetime.fromisoformat(created_at), int(sid)
+    except ValueError:
+        return None
+
+def get_page_size():
     try:
-        cursor.execute("""
+        size = int(request.args.get("page_size", PAGE_SIZE))
+    except ValueError:
+        size = PAGE_SIZE
+    return max(1, min(size, MAX_PAGE_SIZE))
+
+# ----------------- Search helpers -----------------
+# Every branch is index-backed: primary key / phone prefix for numbers,
+# FULLTEXT on (name, room, email) for words, name/room/email prefixes for
+# tokens too short for the FULLTEXT parser.
+def search_clause(keyword):
+    if keyword.isdigit():
+        return (
+            "(id = %s OR phone LIKE %s OR room = %s)", [int(keyword), f"{keyword}%", keyword],
+            "(id = %s)", [int(keyword)],
+        )
+
+    terms = re.findall(r"\w+", keyword)
+    long_terms = [t for t in terms if len(t) >= FT_MIN_TOKEN] if FULLTEXT_ENABLED else []
+
+    where, params = [], []
+    score, score_params = "0", []
+    if long_terms:
+        match = "MATCH(name, room, email) AGAINST (%s IN BOOLEAN MODE)"
+        boolean_query = " ".join(f"+{t}*" for t in long_terms)
+        where.append(match)
+        params.append(boolean_query)
+        score, score_params = match, [boolean_query]
+    if len(long_terms) < len(terms):
+        # FULLTEXT never indexes the short tokens ("jo.li@ab.io", "A-101"), so match
+        # the whole keyword as a column prefix instead of ANDing each token
+        where.append("(name LIKE %s OR room LIKE %s OR email LIKE %s)")
+        params += [keyword.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"] * 3
+    if not where:
+        where.append("room = %s")
+        params.append(keyword)
+    return " AND ".join(where), params, score, score_params
+
+# ----------------- Schema migrations -----------------
+# Applied in order and recorded in schema_migrations. Never edit a step that has
+# shipped; append a new one. Steps are idempotent so databases created by the old
+# CREATE TABLE IF NOT EXISTS code adopt the history without changes.
+def index_exists(cursor, name):
+    cursor.execute(
+        "SELECT COUNT(*) FROM information_schema.statistics "
+        "WHERE table_schema = DATABASE() AND table_name = 'students' AND index_name = %s",
+        (name,),
+    )
+    return cursor.fetchone()[0] > 0
+
+def add_index(name, columns):
+    # INPLACE/LOCK=NONE builds the index online: InnoDB keeps serving reads and writes
+    def step(cursor):
+        if not index_exists(cursor, name):
+            cursor.execute(f"ALTER TABLE students ADD INDEX {name} ({columns}), ALGORITHM=INPLACE, LOCK=NONE")
+    return step
+
+def add_fulltext_index(cursor):
+    # Optional: without it search falls back to prefix LIKEs (see init_db)
+    if not index_exists(cursor, "ft_students_search"):
+        try:
+            cursor.execute("CREATE FULLTEXT INDEX ft_students_search ON students (name, room, email)")
+        except mysql.connector.Error as e:
+            print(f"⚠️ FULLTEXT index unavailable, falling back to prefix search: {e}")
+
+MIGRATIONS = [
+    (1, "create students", ["""
         CREATE TABLE IF NOT EXISTS students (
             id INT PRIMARY KEY,
             name VARCHAR(255) NOT NULL,
@@ -62,36 +244,367 @@ def init_db():
             fees_paid TINYINT DEFAULT 0,
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         )
-        """)
-        conn.commit()
-        print("✅ Students table ensured")
+    """]),
+    # Bumped in the same transaction as every write to students; drives ETags
+    (2, "create table_versions", ["""
+        CREATE TABLE IF NOT EXISTS table_versions (
+            name VARCHAR(64) PRIMARY KEY,
+            version BIGINT NOT NULL DEFAULT 0,
+            updated_at DATETIME NOT NULL
+        )
+    """, "INSERT IGNORE INTO table_versions (name, version, updated_at) VALUES ('students', 0, UTC_TIMESTAMP())"]),
+    (3, "index students.created_at", [add_index("idx_students_created_at", "created_at, id")]),
+    (4, "index students.phone", [add_index("idx_students_phone", "phone")]),
+    (5, "index students.room", [add_index("idx_students_room", "room")]),
+    (6, "index students.email", [add_index("idx_students_email", "email")]),
+    (7, "fulltext index on students name/room/email", [add_fulltext_index]),
+    (8, "index students.fees_paid", [add_index("idx_students_fees_paid", "fees_paid")]),
+    # Short search terms match name/room/email prefixes; room and email already have one
+    (9, "index students.name", [add_index("idx_students_name", "name")]),
+]
+
+def applied_migrations(cursor):
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        version INT PRIMARY KEY,
+        name VARCHAR(255) NOT NULL,
+        applied_at DATETIME NOT NULL
+    )
+    """)
+    cursor.execute("SELECT version FROM schema_migrations")
+    return {row[0] for row in cursor.fetchall()}
+
+def migrate():
+    # GET_LOCK serialises workers and pods that start at the same time
+    conn = get_conn()
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT GET_LOCK('hostel_schema_migrations', %s)", (MIGRATION_LOCK_TIMEOUT,))
+        if cursor.fetchone()[0] != 1:
+            raise RuntimeError(f"schema migration lock not acquired after {MIGRATION_LOCK_TIMEOUT}s")
+        try:
+            done = applied_migrations(cursor)
+            applied = []
+            for version, name, steps in MIGRATIONS:
+                if version in done:
+                    continue
+                for step in steps:
+                    if callable(step):
+                        step(cursor)
+                    else:
+                        cursor.execute(step)
+                cursor.execute("INSERT INTO schema_migrations (version, name, applied_at) "
+                               "VALUES (%s, %s, UTC_TIMESTAMP())", (version, name))
+                conn.commit()
+                print(f"✅ Applied migration {version}: {name}")
+                applied.append(version)
+            return applied
+        finally:
+            cursor.execute("SELECT RELEASE_LOCK('hostel_schema_migrations')")
+            cursor.fetchone()
     finally:
         cursor.close()
         conn.close()
 
+def pending_migrations(cursor):
+    return [version for version, _, _ in MIGRATIONS if version not in applied_migrations(cursor)]
+
+def init_db(apply_migrations=True):
+    global FULLTEXT_ENABLED
+    if apply_migrations:
+        migrate()
+    conn = get_conn()
+    cursor = conn.cursor()
+    try:
+        if not apply_migrations:
+            pending = pending_migrations(cursor)
+            if pending:
+                raise RuntimeError(f"migrations {pending} not applied yet; run `flask db-migrate`")
+        FULLTEXT_ENABLED = index_exists(cursor, "ft_students_search")
+    finally:
+        cursor.close()
+        conn.close()
+    print("✅ Students table ensured")
+
+@app.cli.command("db-migrate")
+@click.option("--status", is_flag=True, help="List applied and pending migrations without applying any.")
+def db_migrate_command(status):
+    """Apply pending schema migrations."""
+    if not status:
+        applied = migrate()
+        click.echo(f"Applied {len(applied)} migrations")
+    conn = get_conn()
+    cursor = conn.cursor()
+    try:
+        done = applied_migrations(cursor)
+    finally:
+        cursor.close()
+        conn.close()
+    if status:
+        for version, name, _ in MIGRATIONS:
+            click.echo(f"{'applied' if version in done else 'pending':8} {version:3}  {name}")
+
+# Hot queries and what they filter or sort on; EXPLAIN must not show a full scan
+PLAN_CHECKS = [
+    ("list page", "SELECT id FROM students ORDER BY created_at DESC, id DESC LIMIT 50", []),
+    ("list page after cursor",
+     "SELECT id FROM students WHERE created_at < %s OR (created_at = %s AND id < %s) "
+     "ORDER BY created_at DESC, id DESC LIMIT 50", ["2024-01-01 00:00:00", "2024-01-01 00:00:00", 1]),
+    ("search by id or phone", "SELECT id FROM students WHERE id = %s OR phone LIKE %s", [98, "98%"]),
+    ("search by short term",
+     "SELECT id FROM students WHERE name LIKE %s OR room LIKE %s OR email LIKE %s", ["ab%", "ab%", "ab%"]),
+    ("import email check", "SELECT email FROM students WHERE email IN (%s, %s)", ["a@x.com", "b@x.com"]),
+    ("bulk pay by room", "SELECT id FROM students WHERE room LIKE %s AND fees_paid = 0 ORDER BY id LIMIT 500", ["A-1%"]),
+    ("export by room", "SELECT id FROM students WHERE room = %s ORDER BY id", ["A-101"]),
+    ("export unpaid", "SELECT id FROM students WHERE fees_paid = %s ORDER BY id", [0]),
+]
+
+def check_query_plans():
+    # Returns (name, status, detail) per check; status is "ok", "small table" or "SCAN"
+    conn = get_conn()
+    cursor = conn.cursor(dictionary=True)
+    results = []
+    try:
+        for name, sql, params in PLAN_CHECKS:
+            cursor.execute("EXPLAIN " + sql, params)
+            plan = cursor.fetchall()
+            scans = [row for row in plan if row.get("table") == "students" and row.get("type") == "ALL"]
+            detail = "; ".join(f"type={row.get('type')} key={row.get('key')} rows={row.get('rows')}" for row in plan)
+            if not scans:
+                status = "ok"
+            elif max(int(row.get("rows") or 0) for row in scans) < PLAN_CHECK_MIN_ROWS:
+                # The optimizer prefers a scan on tiny tables even when an index exists
+                status = "small table"
+            else:
+                status = "SCAN"
+            results.append((name, status, detail))
+    finally:
+        cursor.close()
+        conn.close()
+    return results
+
+@app.cli.command("check-plans")
+def check_plans_command():
+    """EXPLAIN the hot student queries and fail if any does a full table scan."""
+    results = check_query_plans()
+    for name, status, detail in results:
+        click.echo(f"{status:12} {name:24} {detail}")
+    if any(status == "SCAN" for _, status, _ in results):
+        raise click.ClickException("full table scans found; add an index in a new migration")
+
+# ----------------- HTTP caching -----------------
+def bump_students_version(cursor):
+    # Call before commit so the version moves with the data it describes
+    cursor.execute("UPDATE table_versions SET version = version + 1, updated_at = UTC_TIMESTAMP() "
+                   "WHERE name = 'students'")
+    # Old fragments can no longer be hit (their key has the old version); free them now
+    fragment_cache.clear()
+
+def students_validators():
+    conn = get_conn()
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT version, updated_at FROM table_versions WHERE name = 'students'")
+        version, updated_at = cursor.fetchone()
+    finally:
+        cursor.close()
+        conn.close()
+    last_modified = updated_at.replace(tzinfo=timezone.utc)
+    g.students_version = f"{version}-{int(last_modified.timestamp())}"
+    # Same table version, different page or search -> different ETag
+    etag = f"students-{version}-{int(last_modified.timestamp())}-{zlib.crc32(request.query_string):08x}"
+    return etag, last_modified
+
+def conditional_on_students(view):
+    # Answer 304 from the version row alone, before the view queries or renders
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        etag, last_modified = students_validators()
+        # A pending flash message still has to be shown
+        if "_flashes" not in session and not is_resource_modified(
+            request.environ, etag=etag, last_modified=last_modified
+        ):
+            response = make_response("", 304)
+        else:
+            response = make_response(view(*args, **kwargs))
+        response.set_etag(etag, weak=True)
+        response.last_modified = last_modified
+        response.cache_control.private = True
+        response.cache_control.no_cache = True
+        return response
+    return wrapper
+
+# ----------------- Fragment cache -----------------
+class FragmentCache:
+    # LRU of rendered HTML bounded by total size, optionally backed by Redis.
+    # Keys carry the table version, so a write invalidates every worker's entries.
+    def __init__(self, max_bytes, shared=None, ttl=300):
+        self.max_bytes = max_bytes
+        self.shared = shared
+        self.ttl = ttl
+        self.stats = {"hit": 0, "miss": 0, "eviction": 0}
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def _count(self, event):
+        # Caller holds self._lock: += on a dict entry is not atomic across threads
+        self.stats[event] += 1
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self._count("hit")
+                return value
+        if self.shared is not None:
+            try:
+                raw = self.shared.get(key)
+            except redis.RedisError:
+                raw = None
+            if raw is not None:
+                value = raw.decode()
+                self._store(key, value)
+        with self._lock:
+            self._count("hit" if value is not None else "miss")
+        return value
+
+    def set(self, key, value):
+        self._store(key, value)
+        if self.shared is not None:
+            try:
+                self.shared.setex(key, self.ttl, value)
+            except redis.RedisError:
+                pass
+
+    def _store(self, key, value):
+        size = sys.getsizeof(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= sys.getsizeof(old)
+            self._entries[key] = value
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= sys.getsizeof(evicted)
+                self._count("eviction")
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+def make_fragment_cache():
+    shared = None
+    if FRAGMENT_CACHE_REDIS_URL:
+        if redis is None:
+            print("⚠️ FRAGMENT_CACHE_REDIS_URL is set but redis is not installed; using the local cache only")
+        else:
+            shared = redis.Redis.from_url(FRAGMENT_CACHE_REDIS_URL, socket_timeout=0.2)
+    return FragmentCache(FRAGMENT_CACHE_BYTES, shared=shared, ttl=FRAGMENT_CACHE_TTL)
+
+fragment_cache = make_fragment_cache()
+
 # ----------------- Existing routes -----------------
 @app.route("/")
+@conditional_on_students
 def index():
-    keyword = request.args.get("keyword", "")
+    keyword = request.args.get("keyword", "").strip()
+    page_size = get_page_size()
+
+    key = f"hostel:students:{g.students_version}:{request.query_string.decode()}"
+    table_html = fragment_cache.get(key)
+    if table_html is None:
+        table_html = search_students(keyword, page_size) if keyword else list_students(page_size)
+        fragment_cache.set(key, table_html)
+
+    return render_template("index.html", table_html=Markup(table_html), keyword=keyword, page_size=page_size)
+
+def list_students(page_size):
+    after = decode_cursor(request.args.get("after"))
+    before = decode_cursor(request.args.get("before"))
+    if before:
+        # Walk backwards from the first row of the current page, then flip
+        sql = """
+        SELECT * FROM students
+        WHERE created_at > %s OR (created_at = %s AND id > %s)
+        ORDER BY created_at ASC, id ASC LIMIT %s
+        """
+        params = (before[0], before[0], before[1], page_size + 1)
+    elif after:
+        sql = """
+        SELECT * FROM students
+        WHERE created_at < %s OR (created_at = %s AND id < %s)
+        ORDER BY created_at DESC, id DESC LIMIT %s
+        """
+        params = (after[0], after[0], after[1], page_size + 1)
+    else:
+        sql = "SELECT * FROM students ORDER BY created_at DESC, id DESC LIMIT %s"
+        params = (page_size + 1,)
+
     conn = get_conn()
     cursor = conn.cursor(dictionary=True)
     try:
-        if keyword:
-            like = f"%{keyword}%"
-            sql = """
-            SELECT * FROM students
-            WHERE CAST(id AS CHAR) LIKE %s OR name LIKE %s OR room LIKE %s OR phone LIKE %s
-            ORDER BY created_at DESC
-            """
-            cursor.execute(sql, (like, like, like, like))
-        else:
-            cursor.execute("SELECT * FROM students ORDER BY created_at DESC")
+        cursor.execute(sql, params)
         students = cursor.fetchall()
     finally:
         cursor.close()
         conn.close()
 
-    return render_template("index.html", students=students, keyword=keyword)
+    has_more = len(students) > page_size
+    students = students[:page_size]
+    if before:
+        students.reverse()
+        has_prev, has_next = has_more, True
+    else:
+        has_prev, has_next = after is not None, has_more
+
+    prev_url = next_url = None
+    if students and has_prev:
+        prev_url = url_for("index", page_size=page_size, before=encode_cursor(students[0]))
+    if students and has_next:
+        next_url = url_for("index", page_size=page_size, after=encode_cursor(students[-1]))
+
+    return render_template("_students_table.html", students=students, prev_url=prev_url, next_url=next_url)
+
+def search_students(keyword, page_size):
+    try:
+        offset = max(0, int(request.args.get("offset", 0)))
+    except ValueError:
+        offset = 0
+
+    where, params, score, score_params = search_clause(keyword)
+    sql = f"""
+    SELECT *, {score} AS score FROM students
+    WHERE {where}
+    ORDER BY score DESC, created_at DESC, id DESC
+    LIMIT %s OFFSET %s
+    """
+
+    conn = get_conn()
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute(sql, score_params + params + [page_size + 1, offset])
+        students = cursor.fetchall()
+    finally:
+        cursor.close()
+        conn.close()
+
+    has_more = len(students) > page_size
+    students = students[:page_size]
+
+    prev_url = next_url = None
+    if offset:
+        prev_url = url_for("index", keyword=keyword, page_size=page_size,
+                           offset=max(0, offset - page_size) or None)
+    if has_more:
+        next_url = url_for("index", keyword=keyword, page_size=page_size, offset=offset + page_size)
+
+    return render_template("_students_table.html", students=students, prev_url=prev_url, next_url=next_url)
 
 @app.route("/add", methods=["GET", "POST"])
 def add_student():
@@ -109,8 +622,12 @@ def add_student():
         conn = get_conn()
         cursor = conn.cursor()
         try:
+            if taken_emails(conn, [email]):
+                flash(f"Error: email {email} already exists", "danger")
+                return redirect(url_for("add_student"))
             query = "INSERT INTO students (id, name, room, phone, email) VALUES (%s, %s, %s, %s, %s)"
             cursor.execute(query, (sid, name, room, phone, email))
+            bump_students_version(cursor)
             conn.commit()
             flash("Student added successfully", "success")
             return redirect(url_for("index"))
@@ -137,8 +654,11 @@ def edit_student(sid):
 
             cursor2 = conn.cursor()
             try:
+                if taken_emails(conn, [email], exclude_id=sid):
+                    raise ValueError(f"email {email} already exists")
                 cursor2.execute("UPDATE students SET name=%s, room=%s, phone=%s, email=%s WHERE id=%s",
                                 (name, room, phone, email, sid))
+                bump_students_version(cursor2)
                 conn.commit()
                 flash("Student updated", "success")
                 return redirect(url_for("index"))
@@ -165,6 +685,7 @@ def pay_fees(sid):
     cursor = conn.cursor()
     try:
         cursor.execute("UPDATE students SET fees_paid = 1 WHERE id = %s", (sid,))
+        bump_students_version(cursor)
         conn.commit()
         flash("Fees marked as paid", "success")
     except Exception as e:
@@ -175,6 +696,101 @@ def pay_fees(sid):
         conn.close()
     return redirect(url_for("index"))
 
+def mark_paid_chunk(conn, cursor, ids):
+    cursor.execute(
+        f"UPDATE students SET fees_paid = 1 WHERE fees_paid = 0 AND id IN ({', '.join(['%s'] * len(ids))})", ids
+    )
+    updated = cursor.rowcount
+    if updated:
+        bump_students_version(cursor)
+    conn.commit()
+    return updated
+
+def bulk_mark_paid(ids=None, room_prefix=None):
+    # Returns (matched, updated): students found, and those of them that were still unpaid
+    matched = updated = 0
+    conn = get_conn()
+    cursor = conn.cursor()
+    try:
+        if ids:
+            for i in range(0, len(ids), BULK_CHUNK_SIZE):
+                chunk = ids[i:i + BULK_CHUNK_SIZE]
+                cursor.execute(
+                    f"SELECT COUNT(*) FROM students WHERE id IN ({', '.join(['%s'] * len(chunk))})", chunk
+                )
+                matched += cursor.fetchone()[0]
+                updated += mark_paid_chunk(conn, cursor, chunk)
+        elif room_prefix:
+            # Walk unpaid students in the rooms by id so each chunk is a short transaction
+            pattern = room_prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+            last_id = None
+            while True:
+                sql = "SELECT id FROM students WHERE room LIKE %s AND fees_paid = 0"
+                params = [pattern]
+                if last_id is not None:
+                    sql += " AND id > %s"
+                    params.append(last_id)
+                cursor.execute(sql + " ORDER BY id LIMIT %s", params + [BULK_CHUNK_SIZE])
+                chunk = [row[0] for row in cursor.fetchall()]
+                if not chunk:
+                    break
+                matched += len(chunk)
+                updated += mark_paid_chunk(conn, cursor, chunk)
+                last_id = chunk[-1]
+    except mysql.connector.Error:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+    return matched, updated
+
+def bulk_pay_params():
+    # Returns (ids, room_prefix) from a form or a JSON object; ValueError if malformed
+    if not request.is_json:
+        try:
+            ids = {int(i) for i in request.form.getlist("ids")}
+        except ValueError:
+            raise ValueError("ids must be integers")
+        return sorted(ids), request.form.get("room_prefix", "").strip()
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        raise ValueError("expected a JSON object with ids or room_prefix")
+    ids, room_prefix = data.get("ids") or [], data.get("room_prefix") or ""
+    if not isinstance(ids, list) or not all(type(i) is int for i in ids):
+        raise ValueError("ids must be a list of integers")
+    if not isinstance(room_prefix, str):
+        raise ValueError("room_prefix must be a string")
+    return sorted(set(ids)), room_prefix.strip()
+
+@app.route("/pay/bulk", methods=["POST"])
+def bulk_pay_fees():
+    wants_json = request.is_json or request.args.get("format") == "json"
+
+    try:
+        ids, room_prefix = bulk_pay_params()
+        if not (ids or room_prefix):
+            raise ValueError("Select students or give a room prefix")
+    except ValueError as e:
+        if wants_json:
+            return jsonify(error=str(e)), 400
+        flash(str(e), "warning")
+        return redirect(url_for("index"))
+
+    try:
+        matched, updated = bulk_mark_paid(ids=ids, room_prefix=room_prefix)
+    except mysql.connector.Error as e:
+        if wants_json:
+            return jsonify(error=str(e)), 500
+        flash(f"Could not mark fees: {e}", "danger")
+        return redirect(url_for("index"))
+
+    if wants_json:
+        return jsonify(matched=matched, updated=updated)
+    not_found = len(ids) - matched if ids else 0
+    flash(f"Marked {updated} students as paid ({matched - updated} already paid, {not_found} not found)", "success")
+    return redirect(url_for("index"))
+
 @app.route("/delete/<int:sid>", methods=["GET", "POST"])
 def delete_student(sid):
     if request.method == "POST":
@@ -182,6 +798,7 @@ def delete_student(sid):
         cursor = conn.cursor()
         try:
             cursor.execute("DELETE FROM students WHERE id=%s", (sid,))
+            bump_students_version(cursor)
             conn.commit()
             flash("Student deleted", "success")
         except Exception as e:
@@ -206,8 +823,598 @@ def delete_student(sid):
 
     return render_template("confirm_delete.html", student=student)
 
-init_db()
-init_db_with_retry()
+# ----------------- Bulk import -----------------
+def read_import_rows(stream, filename):
+    # Yield (row, error) per row of a CSV, JSON-lines or JSON-array file. Rows are
+    # committed in batches as they stream in, so a row that cannot be parsed is
+    # reported like any other rejected row instead of aborting the import.
+    name = filename.lower()
+    if name.endswith(".json"):
+        data = stream.read(IMPORT_JSON_MAX_BYTES + 1)
+        if len(data) > IMPORT_JSON_MAX_BYTES:
+            raise ValueError(f".json files are limited to {IMPORT_JSON_MAX_BYTES // (1024 * 1024)} MB; "
+                             "use .ndjson (one object per line) for larger imports")
+        rows = json.loads(data.decode("utf-8-sig"))
+        if not isinstance(rows, list):
+            raise ValueError("expected a JSON array of objects")
+        for row in rows:
+            yield row, None
+        return
+    if not name.endswith((".csv", ".ndjson", ".jsonl")):
+        raise ValueError("expected a .csv, .json or .ndjson file")
+
+    # Decoded line by line, so invalid UTF-8 costs one row (marked with U+FFFD), not the file
+    lines = (line.decode("utf-8-sig" if i == 0 else "utf-8", errors="replace") for i, line in enumerate(stream))
+    try:
+        if name.endswith(".csv"):
+            for row in csv.DictReader(lines):
+                if "\ufffd" in "".join(map(str, row.values())):
+                    yield None, "invalid UTF-8"
+                else:
+                    yield row, None
+        else:
+            for line in lines:
+                if not line.strip():
+                    continue
+                if "\ufffd" in line:
+                    yield None, "invalid UTF-8"
+                    continue
+                try:
+                    yield json.loads(line), None
+                except ValueError as e:
+                    yield None, f"invalid JSON: {e}"
+    except csv.Error as e:
+        # The CSV reader cannot resynchronise after this; earlier rows stay imported
+        yield None, f"file unreadable from this row on, remaining rows skipped: {e}"
+
+def validate_import_row(row):
+    # Same rules as the add form, plus the 10-digit phone check
+    if not isinstance(row, dict):
+        return None, "expected an object with id, name and room"
+    try:
+        sid = int(str(row.get("id", "")).strip())
+    except ValueError:
+        return None, "id must be a number"
+    name = str(row.get("name") or "").strip()
+    room = str(row.get("room") or "").strip()
+    phone = str(row.get("phone") or "").strip() or None
+    email = str(row.get("email") or "").strip() or None
+    if not name or not room:
+        return None, "name and room are required"
+    if phone and (not phone.isdigit() or len(phone) != 10):
+        return None, "phone number must be exactly 10 digits"
+    return (sid, name, room, phone, email), None
+
+def taken_emails(conn, emails, exclude_id=None):
+    # email only has a plain index, so uniqueness is checked here for the form, import and API
+    emails = [email for email in emails if email]
+    if not emails:
+        return set()
+    sql = f"SELECT email FROM students WHERE email IN ({', '.join(['%s'] * len(emails))})"
+    if exclude_id is not None:
+        sql += " AND id <> %s"
+    cursor = conn.cursor()
+    try:
+        cursor.execute(sql, emails + ([exclude_id] if exclude_id is not None else []))
+        return {row[0] for row in cursor.fetchall()}
+    finally:
+        cursor.close()
+
+def insert_student_batch(conn, cursor, batch, errors):
+    ids = [record[0] for _, record in batch]
+    cursor.execute(f"SELECT id FROM students WHERE id IN ({', '.join(['%s'] * len(ids))})", ids)
+    taken_ids = {row[0] for row in cursor.fetchall()}
+    taken = taken_emails(conn, [record[4] for _, record in batch])
+
+    rows, lines = [], []
+    for line, record in batch:
+        if record[0] in taken_ids:
+            errors.append({"row": line, "error": f"id {record[0]} already exists"})
+        elif record[4] and record[4] in taken:
+            errors.append({"row": line, "error": f"email {record[4]} already exists"})
+        else:
+            rows.append(record)
+            lines.append(line)
+    if not rows:
+        return 0
+
+    try:
+        cursor.executemany("INSERT INTO students (id, name, room, phone, email) VALUES (%s, %s, %s, %s, %s)", rows)
+        bump_students_version(cursor)
+        conn.commit()
+    except mysql.connector.Error as e:
+        conn.rollback()
+        # Rows already reported as duplicates above keep their own error
+        errors.extend({"row": line, "error": f"batch rejected: {e}"} for line in lines)
+        return 0
+    return len(rows)
+
+def bulk_insert_students(rows):
+    inserted, errors = 0, []
+    seen_ids, seen_emails = set(), set()
+    batch = []
+    conn = get_conn()
+    cursor = conn.cursor()
+    try:
+        for line, (row, error) in enumerate(rows, start=1):
+            record = None
+            if not error:
+                record, error = validate_import_row(row)
+            if record and record[0] in seen_ids:
+                error = f"id {record[0]} appears more than once"
+            elif record and record[4] and record[4] in seen_emails:
+                error = f"email {record[4]} appears more than once"
+            if error:
+                errors.append({"row": line, "error": error})
+                continue
+            seen_ids.add(record[0])
+            if record[4]:
+                seen_emails.add(record[4])
+            batch.append((line, record))
+            if len(batch) >= IMPORT_BATCH_SIZE:
+                inserted += insert_student_batch(conn, cursor, batch, errors)
+                batch = []
+        if batch:
+            inserted += insert_student_batch(conn, cursor, batch, errors)
+    finally:
+        cursor.close()
+        conn.close()
+    errors.sort(key=lambda e: e["row"])
+    return inserted, errors
+
+@app.route("/import", methods=["GET", "POST"])
+def import_students():
+    if request.method == "POST":
+        upload = request.files.get("file")
+        if not upload or not upload.filename:
+            flash("Choose a CSV or JSON file to import", "danger")
+            return redirect(url_for("import_students"))
+        try:
+            inserted, errors = bulk_insert_students(read_import_rows(upload.stream, upload.filename))
+        except ValueError as e:
+            flash(f"Could not read {upload.filename}: {e}", "danger")
+            return redirect(url_for("import_students"))
+
+        if request.args.get("format") == "json":
+            return jsonify(inserted=inserted, errors=errors)
+        flash(f"Imported {inserted} students, {len(errors)} rows rejected", "warning" if errors else "success")
+        return render_template("import_students.html", errors=errors)
+
+    return render_template("import_students.html", errors=None)
+
+@app.cli.command("import-students")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+def import_students_command(path):
+    """Bulk-import students from a CSV, JSON or NDJSON file."""
+    with open(path, "rb") as f:
+        try:
+            inserted, errors = bulk_insert_students(read_import_rows(f, path))
+        except ValueError as e:
+            # Unsupported extension, oversized or malformed .json: nothing was imported
+            click.echo(f"Could not read {path}: {e}", err=True)
+            sys.exit(1)
+    for error in errors:
+        click.echo(f"row {error['row']}: {error['error']}", err=True)
+    click.echo(f"Imported {inserted} students, {len(errors)} rows rejected")
+
+# ----------------- Synthetic data -----------------
+SEED_FIRST = ("Aarav", "Vivaan", "Aditya", "Ishaan", "Arjun", "Kabir", "Rohan", "Dev", "Karan", "Rahul",
+              "Diya", "Ananya", "Saanvi", "Meera", "Riya", "Isha", "Priya", "Neha", "Kavya", "Pooja")
+SEED_LAST = ("Sharma", "Verma", "Gupta", "Mathur", "Iyer", "Reddy", "Nair", "Khan", "Singh", "Das",
+             "Patel", "Joshi", "Mehta", "Rao", "Bose", "Kulkarni", "Menon", "Pillai", "Chopra", "Malhotra")
+
+def synthetic_room(n):
+    # Rooms fill SEED_ROOM_CAPACITY at a time: blocks A-Z, 10 floors of 40 rooms, then A2-Z2, ...
+    room = n // SEED_ROOM_CAPACITY
+    block, rest = divmod(room, 400)
+    label = chr(ord("A") + block % 26) + (str(block // 26 + 1) if block >= 26 else "")
+    return f"{label}-{rest // 40 + 1}{rest % 40 + 1:02d}"
+
+def synthetic_students(count, start_id=1, seed=42):
+    # Deterministic (id, name, room, phone, email, fees_paid, created_at) rows spread over the past year
+    rnd = random.Random(seed)
+    now = datetime.utcnow().replace(microsecond=0)
+    for n in range(count):
+        sid = start_id + n
+        first, last = rnd.choice(SEED_FIRST), rnd.choice(SEED_LAST)
+        yield (
+            sid,
+            f"{first} {last}",
+            synthetic_room(sid - 1),
+            f"{rnd.randint(6, 9)}{rnd.randint(0, 999999999):09d}",
+            f"{first}.{last}{sid}@hostel.edu".lower(),
+            int(rnd.random() < 0.7),
+            now - timedelta(seconds=rnd.randint(0, 365 * 24 * 3600)),
+        )
+
+def seed_students(count, start_id=None, seed=42, batch_size=SEED_BATCH_SIZE):
+    conn = get_conn()
+    cursor = conn.cursor()
+    try:
+        # Pool connections run with autocommit off: one transaction per batch, not per row
+        if start_id is None:
+            cursor.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM students")
+            start_id = cursor.fetchone()[0]
+        rows = synthetic_students(count, start_id, seed)
+        inserted = 0
+        while inserted < count:
+            batch = [row for _, row in zip(range(batch_size), rows)]
+            # mysql.connector sends an INSERT ... VALUES executemany as one multi-row statement
+            cursor.executemany("INSERT INTO students (id, name, room, phone, email, fees_paid, created_at) "
+                               "VALUES (%s, %s, %s, %s, %s, %s, %s)", batch)
+            inserted += len(batch)
+            # Each committed batch is visible to readers, so it must move the version too
+            bump_students_version(cursor)
+            conn.commit()
+        return inserted
+    except mysql.connector.Error:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+
+@app.cli.command("seed-students")
+@click.argument("count", type=click.IntRange(min=1))
+@click.option("--start-id", type=int, default=None, help="First id to use (default: after the current max id).")
+@click.option("--seed", type=int, default=42, show_default=True, help="Random seed; same seed, same rows.")
+@click.option("--batch-size", type=click.IntRange(min=1), default=SEED_BATCH_SIZE, show_default=True)
+def seed_students_command(count, start_id, seed, batch_size):
+    """Insert COUNT synthetic students for load and sizing tests."""
+    started = time.perf_counter()
+    try:
+        inserted = seed_students(count, start_id, seed, batch_size)
+    except IntegrityError as e:
+        raise click.ClickException(f"{e.msg}; choose a free --start-id")
+    elapsed = time.perf_counter() - started
+    click.echo(f"✅ Seeded {inserted} students in {elapsed:.1f}s ({inserted / elapsed:.0f} rows/s)")
+
+# ----------------- Export -----------------
+def export_filters():
+    clauses, params = [], []
+    fees_paid = request.args.get("fees_paid", "").strip().lower()
+    if fees_paid:
+        if fees_paid not in ("1", "0", "true", "false", "yes", "no"):
+            abort(400, "fees_paid must be true or false")
+        clauses.append("fees_paid = %s")
+        params.append(1 if fees_paid in ("1", "true", "yes") else 0)
+    room = request.args.get("room", "").strip()
+    if room:
+        clauses.append("room = %s")
+        params.append(room)
+    return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+def iter_export_chunks(where, params):
+    # Default mysql.connector cursors are unbuffered, so fetchmany() pulls rows off
+    # the socket as we go and memory stays at one chunk whatever the table size.
+    conn = get_conn()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"SELECT {', '.join(EXPORT_COLUMNS)} FROM students{where} ORDER BY id", params)
+        while True:
+            rows = cursor.fetchmany(EXPORT_CHUNK_ROWS)
+            if not rows:
+                break
+            yield rows
+    finally:
+        # A client that disconnects mid-download leaves rows unread on the connection
+        conn.consume_results()
+        cursor.close()
+        conn.close()
+
+def export_value(value):
+    return value.isoformat(sep=" ") if isinstance(value, datetime) else value
+
+def csv_chunks(chunks):
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(EXPORT_COLUMNS)
+    for rows in chunks:
+        writer.writerows([export_value(v) for v in row] for row in rows)
+        yield buf.getvalue()
+        buf.seek(0)
+        buf.truncate()
+    yield buf.getvalue()
+
+def ndjson_chunks(chunks):
+    for rows in chunks:
+        yield "".join(
+            json.dumps(dict(zip(EXPORT_COLUMNS, map(export_value, row)))) + "\n" for row in rows
+        )
+
+@app.route("/students/export.<fmt>")
+def export_students(fmt):
+    if fmt == "csv":
+        writer, mimetype = csv_chunks, "text/csv"
+    elif fmt == "ndjson":
+        writer, mimetype = ndjson_chunks, "application/x-ndjson"
+    else:
+        abort(404)
+
+    where, params = export_filters()
+    chunks = iter_export_chunks(where, params)
+    # Pull the first chunk now so a saturated pool is still a 503, not a cut-off download
+    first = next(chunks, [])
+    body = stream_with_context(writer(chain([first], chunks)))
+    return Response(body, mimetype=mimetype,
+                    headers={"Content-Disposition": f"attachment; filename=students.{fmt}"})
+
+# ----------------- JSON API -----------------
+API_FIELDS = ("id", "name", "room", "phone", "email", "fees_paid", "created_at")
+API_UPDATABLE = ("name", "room", "phone", "email", "fees_paid")
+API_MAX_IDS = int(os.getenv("API_MAX_IDS", 500))
+
+class ApiError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+@app.errorhandler(ApiError)
+def api_error(e):
+    return jsonify(error=str(e)), e.status
+
+def api_fields():
+    raw = request.args.get("fields", "")
+    if not raw:
+        return list(API_FIELDS)
+    fields = list(dict.fromkeys(f.strip() for f in raw.split(",") if f.strip()))
+    unknown = [f for f in fields if f not in API_FIELDS]
+    if unknown:
+        raise ApiError(f"unknown fields: {', '.join(unknown)}")
+    return fields
+
+def api_ids():
+    try:
+        ids = list(dict.fromkeys(int(i) for i in request.args["ids"].split(",") if i.strip()))
+    except ValueError:
+        raise ApiError("ids must be a comma-separated list of numbers")
+    if len(ids) > API_MAX_IDS:
+        raise ApiError(f"at most {API_MAX_IDS} ids per request")
+    return ids
+
+def api_payload():
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        raise ApiError("expected a JSON object")
+    return data
+
+def api_record(row, fields):
+    return {f: bool(row[f]) if f == "fees_paid" else export_value(row[f]) for f in fields}
+
+def fetch_student(cursor, sid, fields):
+    cursor.execute(f"SELECT {', '.join(fields)} FROM students WHERE id = %s", (sid,))
+    row = cursor.fetchone()
+    if row is None:
+        raise ApiError("student not found", 404)
+    return api_record(row, fields)
+
+@app.route("/api/students")
+@conditional_on_students
+def api_list_students():
+    fields = api_fields()
+    # Keyset paging needs created_at and id even when they are not returned
+    columns = ", ".join(dict.fromkeys(fields + ["created_at", "id"]))
+
+    if "ids" in request.args:
+        ids = api_ids()
+        rows = []
+        if ids:
+            conn = get_conn()
+            cursor = conn.cursor(dictionary=True)
+            try:
+                cursor.execute(f"SELECT {columns} FROM students WHERE id IN ({', '.join(['%s'] * len(ids))})", ids)
+                rows = cursor.fetchall()
+            finally:
+                cursor.close()
+                conn.close()
+        by_id = {row["id"]: row for row in rows}
+        return jsonify(data=[api_record(by_id[i], fields) for i in ids if i in by_id],
+                       missing=[i for i in ids if i not in by_id])
+
+    page_size = get_page_size()
+    sql, params = f"SELECT {columns} FROM students", []
+    if request.args.get("cursor"):
+        after = decode_cursor(request.args["cursor"])
+        if after is None:
+            raise ApiError("invalid cursor")
+        sql += " WHERE created_at < %s OR (created_at = %s AND id < %s)"
+        params = [after[0], after[0], after[1]]
+
+    conn = get_conn()
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute(sql + " ORDER BY created_at DESC, id DESC LIMIT %s", params + [page_size + 1])
+        rows = cursor.fetchall()
+    finally:
+        cursor.close()
+        conn.close()
+
+    next_cursor = encode_cursor(rows[page_size - 1]) if len(rows) > page_size else None
+    return jsonify(data=[api_record(row, fields) for row in rows[:page_size]], next_cursor=next_cursor)
+
+@app.route("/api/students/<int:sid>")
+@conditional_on_students
+def api_get_student(sid):
+    fields = api_fields()
+    conn = get_conn()
+    cursor = conn.cursor(dictionary=True)
+    try:
+        return jsonify(fetch_student(cursor, sid, fields))
+    finally:
+        cursor.close()
+        conn.close()
+
+@app.route("/api/students", methods=["POST"])
+def api_create_student():
+    record, error = validate_import_row(api_payload())
+    if error:
+        raise ApiError(error)
+
+    conn = get_conn()
+    cursor = conn.cursor(dictionary=True)
+    try:
+        if taken_emails(conn, [record[4]]):
+            raise ApiError(f"email {record[4]} already exists", 409)
+        cursor.execute("INSERT INTO students (id, name, room, phone, email) VALUES (%s, %s, %s, %s, %s)", record)
+        bump_students_version(cursor)
+        conn.commit()
+        student = fetch_student(cursor, record[0], list(API_FIELDS))
+    except IntegrityError:
+        conn.rollback()
+        raise ApiError(f"id {record[0]} already exists", 409)
+    finally:
+        cursor.close()
+        conn.close()
+    return jsonify(student), 201, {"Location": url_for("api_get_student", sid=record[0])}
+
+@app.route("/api/students/<int:sid>", methods=["PATCH"])
+def api_update_student(sid):
+    data = api_payload()
+    changes = {}
+    for key in API_UPDATABLE:
+        if key not in data:
+            continue
+        value = data[key]
+        if key == "fees_paid":
+            if value not in (True, False, 0, 1):
+                raise ApiError("fees_paid must be true or false")
+            changes[key] = int(value)
+            continue
+        value = str(value or "").strip() or None
+        if key in ("name", "room") and not value:
+            raise ApiError(f"{key} cannot be empty")
+        if key == "phone" and value and (not value.isdigit() or len(value) != 10):
+            raise ApiError("phone number must be exactly 10 digits")
+        changes[key] = value
+    if not changes:
+        raise ApiError(f"nothing to update; allowed fields: {', '.join(API_UPDATABLE)}")
+
+    conn = get_conn()
+    cursor = conn.cursor(dictionary=True)
+    try:
+        fetch_student(cursor, sid, ["id"])
+        if taken_emails(conn, [changes.get("email")], exclude_id=sid):
+            raise ApiError(f"email {changes['email']} already exists", 409)
+        assignments = ", ".join(f"{key} = %s" for key in changes)
+        cursor.execute(f"UPDATE students SET {assignments} WHERE id = %s", list(changes.values()) + [sid])
+        bump_students_version(cursor)
+        conn.commit()
+        return jsonify(fetch_student(cursor, sid, list(API_FIELDS)))
+    finally:
+        cursor.close()
+        conn.close()
+
+@app.route("/api/students/<int:sid>", methods=["DELETE"])
+def api_delete_student(sid):
+    conn = get_conn()
+    cursor = conn.cursor()
+    try:
+        cursor.execute("DELETE FROM students WHERE id = %s", (sid,))
+        if not cursor.rowcount:
+            raise ApiError("student not found", 404)
+        bump_students_version(cursor)
+        conn.commit()
+    finally:
+        cursor.close()
+        conn.close()
+    return "", 204
+
+# ----------------- Startup -----------------
+# Nothing touches the database at import time. The first request starts init_db()
+# in a background thread; requests wait briefly for it and are answered with a 503
+# while it keeps retrying, so a slow or restarting database delays readiness
+# instead of crash-looping the worker.
+NO_DB_ENDPOINTS = {"static"}
+
+_db_ready = threading.Event()
+_db_init_lock = threading.Lock()
+_db_init_thread = None
+
+class DatabaseStarting(Exception):
+    pass
+
+def init_db_with_backoff():
+    delay = 1
+    while True:
+        try:
+            init_db(apply_migrations=DB_INIT != "skip")
+            _db_ready.set()
+            return
+        except Exception as e:
+            print(f"⏳ Database not ready ({e}), retrying in {delay}s")
+            time.sleep(delay)
+            delay = min(delay * 2, DB_INIT_BACKOFF_MAX)
+
+def start_db_init():
+    global _db_init_thread
+    with _db_init_lock:
+        if _db_init_thread is None:
+            _db_init_thread = threading.Thread(target=init_db_with_backoff, name="db-init", daemon=True)
+            _db_init_thread.start()
+
+def wait_for_db(timeout=None):
+    start_db_init()
+    return _db_ready.wait(timeout)
+
+@app.before_request
+def require_db():
+    if _db_ready.is_set() or request.endpoint in NO_DB_ENDPOINTS:
+        return
+    if not wait_for_db(DB_INIT_WAIT):
+        raise DatabaseStarting()
+
+@app.errorhandler(DatabaseStarting)
+def database_starting(e):
+    return "Starting up, please retry shortly.", 503, {"Retry-After": str(POOL_RETRY_AFTER)}
+
+# ----------------- Health checks -----------------
+# /healthz answers from the process alone (liveness). /readyz also needs startup
+# init to have finished and a database ping to succeed (readiness); the ping runs
+# on its own thread so a hung database costs a probe READY_TIMEOUT, not a worker.
+NO_DB_ENDPOINTS.update({"healthz", "readyz"})
+
+_ping_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="readyz")
+_ready_lock = threading.Lock()
+_ready = {"expires": 0.0, "ok": False, "detail": "not checked", "ping": None}
+
+def ping_db():
+    try:
+        conn = get_conn(timeout=READY_TIMEOUT)
+    except PoolTimeout:
+        return "pool busy"  # every connection is in use, so the database is answering
+    try:
+        conn.ping(reconnect=True, attempts=1)
+    finally:
+        conn.close()
+    return "ok"
+
+def check_ready():
+    if not _db_ready.is_set():
+        start_db_init()  # the first probe warms the pod before it takes traffic
+        return False, "database init in progress"
+    with _ready_lock:
+        if time.monotonic() < _ready["expires"]:
+            return _ready["ok"], _ready["detail"]
+        # A ping still stuck from an earlier probe is waited on, never duplicated
+        if _ready["ping"] is None or _ready["ping"].done():
+            _ready["ping"] = _ping_executor.submit(ping_db)
+        try:
+            ok, detail = True, _ready["ping"].result(timeout=READY_TIMEOUT)
+        except PingTimeout:
+            ok, detail = False, f"database ping took longer than {READY_TIMEOUT}s"
+        except Exception as e:
+            ok, detail = False, f"database ping failed: {e}"
+        _ready.update(expires=time.monotonic() + READY_CACHE_TTL, ok=ok, detail=detail)
+        return ok, detail
+
+@app.route("/healthz")
+def healthz():
+    return jsonify(status="ok")
+
+@app.route("/readyz")
+def readyz():
+    ok, detail = check_ready()
+    return jsonify(status="ready" if ok else "not ready", detail=detail), 200 if ok else 503
 
 if __name__ == "__main__":
     debug = os.getenv("FLASK_DEBUG", "0") == "1"
@@ -0,0 +1,50 @@
+"""Probe cost benchmark: per-request time of /healthz and /readyz next to /,
+which the liveness and readiness probes used to hit, plus how many database
+pings /readyz actually issued.
+
+Needs the app's database to be reachable for / and /readyz.
+
+    python bench_health.py
+    BENCH_REQUESTS=5000 READY_CACHE_TTL=0 python bench_health.py   # ping on every /readyz
+"""
+import os
+import time
+
+N_REQUESTS = int(os.getenv("BENCH_REQUESTS", 2_000))
+N_INDEX_REQUESTS = int(os.getenv("BENCH_INDEX_REQUESTS", 200))
+
+import app  # noqa: E402
+
+pings = 0
+ping_db = app.ping_db
+
+def counted_ping():
+    global pings
+    pings += 1
+    return ping_db()
+
+app.ping_db = counted_ping
+
+def per_request_us(client, path, n):
+    start = time.perf_counter()
+    for _ in range(n):
+        resp = client.get(path)
+        if resp.status_code != 200:
+            raise SystemExit(f"{path} returned {resp.status_code}: {resp.get_data(as_text=True)[:200]}")
+    return (time.perf_counter() - start) / n * 1e6
+
+def main():
+    client = app.app.test_client()
+    if not app.wait_for_db(30):
+        raise SystemExit("database did not become ready within 30s")
+    client.get("/readyz")
+
+    print(f"requests={N_REQUESTS} ready_cache_ttl={app.READY_CACHE_TTL}s")
+    print(f"/healthz  {per_request_us(client, '/healthz', N_REQUESTS):9.1f} us/request")
+    before = pings
+    cost = per_request_us(client, "/readyz", N_REQUESTS)
+    print(f"/readyz   {cost:9.1f} us/request  ({pings - before} database pings)")
+    print(f"/         {per_request_us(client, '/', N_INDEX_REQUESTS):9.1f} us/request")
+
+if __name__ == "__main__":
+    main()
@@ -155,12 +155,19 @@
 #     app.run(host="0.0.0.0", port=5000)
 
 import os
-from datetime import datetime
-from flask import Flask, request, render_template, flash, redirect, url_for
-from sqlalchemy import create_engine, Column, Integer, String, TIMESTAMP, Boolean
+import random
+from bisect import bisect_right
+from collections import OrderedDict
+import threading
+import time
+from datetime import datetime, timedelta
+import click
+from flask import Flask, request, render_template, flash, redirect, url_for, g, jsonify
+from sqlalchemy import create_engine, Column, Integer, String, TIMESTAMP, Boolean, event, text, insert, inspect
+from sqlalchemy.schema import CreateTable
 from sqlalchemy.orm import sessionmaker, scoped_session, declarative_base
 from sqlalchemy.sql import func
-from sqlalchemy.exc import IntegrityError
+from sqlalchemy.exc import IntegrityError, OperationalError
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -179,6 +186,20 @@ engine = create_engine(
 SessionLocal = scoped_session(sessionmaker(bind=engine))
 Base = declarative_base()
 
+# Pool checkout/checkin counters; in_use must return to 0 once traffic stops
+POOL_STATS = {"checkouts": 0, "checkins": 0}
+_pool_stats_lock = threading.Lock()
+
+@event.listens_for(engine, "checkout")
+def _on_checkout(dbapi_conn, conn_record, conn_proxy):
+    with _pool_stats_lock:
+        POOL_STATS["checkouts"] += 1
+
+@event.listens_for(engine, "checkin")
+def _on_checkin(dbapi_conn, conn_record):
+    with _pool_stats_lock:
+        POOL_STATS["checkins"] += 1
+
 # -------------------- ORM MODEL ----------------------
 class Student(Base):
     __tablename__ = "students"
@@ -191,8 +212,318 @@ class Student(Base):
     fees_paid = Column(Boolean, default=False)
     created_at = Column(TIMESTAMP, server_default=func.now())
 
-# Auto-create tables
-Base.metadata.create_all(bind=engine)
+# -------------------- SCHEMA MIGRATIONS --------------
+# Applied in order and recorded in schema_migrations. Never edit a step that has
+# shipped; append a new one. Steps are idempotent so databases made by the old
+# create_all() adopt the history without changes.
+MIGRATION_LOCK_TIMEOUT = int(os.getenv("MIGRATION_LOCK_TIMEOUT", 300))
+
+def create_students(conn):
+    conn.execute(CreateTable(Student.__table__, if_not_exists=True))
+
+def add_index(name, columns):
+    def step(conn):
+        if conn.dialect.name == "mysql":
+            # INPLACE/LOCK=NONE builds the index online: InnoDB keeps serving reads and writes
+            if name not in {ix["name"] for ix in inspect(conn).get_indexes("students")}:
+                conn.exec_driver_sql(f"ALTER TABLE students ADD INDEX {name} ({columns}), ALGORITHM=INPLACE, LOCK=NONE")
+        else:
+            conn.exec_driver_sql(f"CREATE INDEX IF NOT EXISTS {name} ON students ({columns})")
+    return step
+
+# Two FTS5 indexes over the searchable columns: a trigram index for substring
+# matches of 3+ characters and a word-prefix index for shorter keywords. Both
+# live inside SQLite and are kept in sync by triggers, so every gunicorn worker
+# sees the same index.
+SEARCH_INDEX_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS students_fts USING fts5(
+        name, room, phone, email, content='students', content_rowid='id', tokenize='trigram'
+    )""",
+    """CREATE VIRTUAL TABLE IF NOT EXISTS students_prefix USING fts5(
+        name, room, phone, email, content='students', content_rowid='id', prefix='1 2'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS students_search_ai AFTER INSERT ON students BEGIN
+        INSERT INTO students_fts(rowid, name, room, phone, email)
+        VALUES (new.id, new.name, new.room, new.phone, new.email);
+        INSERT INTO students_prefix(rowid, name, room, phone, email)
+        VALUES (new.id, new.name, new.room, new.phone, new.email);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS students_search_ad AFTER DELETE ON students BEGIN
+        INSERT INTO students_fts(students_fts, rowid, name, room, phone, email)
+        VALUES ('delete', old.id, old.name, old.room, old.phone, old.email);
+        INSERT INTO students_prefix(students_prefix, rowid, name, room, phone, email)
+        VALUES ('delete', old.id, old.name, old.room, old.phone, old.email);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS students_search_au AFTER UPDATE ON students BEGIN
+        INSERT INTO students_fts(students_fts, rowid, name, room, phone, email)
+        VALUES ('delete', old.id, old.name, old.room, old.phone, old.email);
+        INSERT INTO students_prefix(students_prefix, rowid, name, room, phone, email)
+        VALUES ('delete', old.id, old.name, old.room, old.phone, old.email);
+        INSERT INTO students_fts(rowid, name, room, phone, email)
+        VALUES (new.id, new.name, new.room, new.phone, new.email);
+        INSERT INTO students_prefix(rowid, name, room, phone, email)
+        VALUES (new.id, new.name, new.room, new.phone, new.email);
+    END""",
+]
+
+def create_search_index(conn):
+    # SQLite only; other databases and SQLite builds without FTS5 search with LIKE
+    if conn.dialect.name != "sqlite":
+        return
+    if not conn.exec_driver_sql("SELECT sqlite_compileoption_used('ENABLE_FTS5')").scalar():
+        print("SQLite has no FTS5, search falls back to LIKE")
+        return
+    existing = set(conn.exec_driver_sql(
+        "SELECT name FROM sqlite_master WHERE name IN ('students_fts', 'students_prefix')"
+    ).scalars())
+    for ddl in SEARCH_INDEX_DDL:
+        conn.exec_driver_sql(ddl)
+    # Index rows that were inserted before the triggers existed
+    for table in ("students_fts", "students_prefix"):
+        if table not in existing:
+            conn.exec_driver_sql(f"INSERT INTO {table}({table}) VALUES ('rebuild')")
+
+# Bumped by every write to students, so cached search rankings know when they are stale
+SEARCH_VERSION_DDL = [
+    "CREATE TABLE IF NOT EXISTS search_version (id INTEGER PRIMARY KEY CHECK (id = 1), version INTEGER NOT NULL)",
+    "INSERT OR IGNORE INTO search_version (id, version) VALUES (1, 0)",
+    *(
+        f"CREATE TRIGGER IF NOT EXISTS students_version_{name} AFTER {op} ON students BEGIN "
+        "UPDATE search_version SET version = version + 1; END"
+        for name, op in (("ai", "INSERT"), ("ad", "DELETE"), ("au", "UPDATE"))
+    ),
+]
+
+def create_search_version(conn):
+    if conn.dialect.name != "sqlite":
+        return
+    for ddl in SEARCH_VERSION_DDL:
+        conn.exec_driver_sql(ddl)
+
+MIGRATIONS = [
+    (1, "create students", [create_students]),
+    (2, "index students.created_at", [add_index("ix_students_created_at", "created_at, id")]),
+    (3, "search index (SQLite FTS5)", [create_search_index]),
+    (4, "search version counter (SQLite)", [create_search_version]),
+]
+
+def applied_migrations(conn):
+    conn.exec_driver_sql(
+        "CREATE TABLE IF NOT EXISTS schema_migrations ("
+        "version INTEGER PRIMARY KEY, name VARCHAR(255) NOT NULL, applied_at DATETIME NOT NULL)"
+    )
+    conn.commit()
+    return set(conn.exec_driver_sql("SELECT version FROM schema_migrations").scalars())
+
+def migrate():
+    # MySQL: GET_LOCK serialises workers that start together. SQLite: every step
+    # is IF NOT EXISTS and a duplicate version row just means another worker won.
+    with engine.connect() as conn:
+        mysql = conn.dialect.name == "mysql"
+        if mysql and conn.execute(
+            text("SELECT GET_LOCK('hostel_schema_migrations', :timeout)"), {"timeout": MIGRATION_LOCK_TIMEOUT}
+        ).scalar() != 1:
+            raise RuntimeError(f"schema migration lock not acquired after {MIGRATION_LOCK_TIMEOUT}s")
+        try:
+            done = applied_migrations(conn)
+            applied = []
+            for version, name, steps in MIGRATIONS:
+                if version in done:
+                    continue
+                for step in steps:
+                    step(conn)
+                try:
+                    conn.execute(
+                        text("INSERT INTO schema_migrations (version, name, applied_at) VALUES (:v, :n, :at)"),
+                        {"v": version, "n": name, "at": datetime.utcnow().replace(microsecond=0)},
+                    )
+                    conn.commit()
+                except IntegrityError:
+                    conn.rollback()
+                    continue
+                print(f"Applied migration {version}: {name}")
+                applied.append(version)
+            return applied
+        finally:
+            if mysql:
+                conn.exec_driver_sql("SELECT RELEASE_LOCK('hostel_schema_migrations')")
+
+def pending_migrations(conn):
+    if not inspect(conn).has_table("schema_migrations"):
+        return [version for version, _, _ in MIGRATIONS]
+    done = set(conn.exec_driver_sql("SELECT version FROM schema_migrations").scalars())
+    return [version for version, _, _ in MIGRATIONS if version not in done]
+
+# -------------------- SEARCH INDEX -------------------
+# The FTS5 tables come from migration 3; SEARCH_INDEX_ENABLED is set once the
+# schema is known to be current (see init_db/check_db).
+SEARCH_LIMIT = int(os.getenv("SEARCH_LIMIT", 100))
+
+SEARCH_INDEX_ENABLED = False
+
+def detect_search_index():
+    global SEARCH_INDEX_ENABLED
+    with engine.connect() as conn:
+        SEARCH_INDEX_ENABLED = conn.dialect.name == "sqlite" and conn.exec_driver_sql(
+            "SELECT COUNT(*) FROM sqlite_master WHERE name IN ('students_fts', 'students_prefix')"
+        ).scalar() == 2
+    return SEARCH_INDEX_ENABLED
+
+# bm25 has to score every match before it can order them, which for a broad
+# keyword means thousands of rows on every page. The first SEARCH_CACHE_ROWS of
+# each ranking are kept per worker, keyed by search_version, so paging and
+# repeated searches read a list instead of re-ranking.
+SEARCH_CACHE_SIZE = int(os.getenv("SEARCH_CACHE_SIZE", 128))
+SEARCH_CACHE_ROWS = int(os.getenv("SEARCH_CACHE_ROWS", 1000))
+
+_search_cache = OrderedDict()
+_search_cache_lock = threading.Lock()
+
+def fts_ranked(db, table, match, after=None, limit=SEARCH_CACHE_ROWS):
+    # (score, rowid) pairs in bm25 order (name weighs most, then room), after the `after` pair
+    params = {"match": match, "limit": limit}
+    keyset = ""
+    if after is not None:
+        keyset = "WHERE score > :score OR (score = :score AND id > :id) "
+        params.update(score=after[0], id=after[1])
+    return [tuple(row) for row in db.execute(
+        text(
+            f"SELECT score, id FROM (SELECT rowid AS id, bm25({table}, 4.0, 2.0, 1.0, 1.0) AS score "
+            f"FROM {table} WHERE {table} MATCH :match) {keyset}ORDER BY score, id LIMIT :limit"
+        ),
+        params,
+    )]
+
+def fts_page(db, table, match, after):
+    # Returns up to SEARCH_LIMIT + 1 (score, rowid) pairs after the `after` pair
+    version = db.execute(text("SELECT version FROM search_version")).scalar()
+    key = (table, match)
+    with _search_cache_lock:
+        entry = _search_cache.get(key)
+        if entry and entry[0] == version:
+            _search_cache.move_to_end(key)
+        else:
+            entry = None
+    if entry is None:
+        entry = (version, fts_ranked(db, table, match))
+        with _search_cache_lock:
+            _search_cache[key] = entry
+            _search_cache.move_to_end(key)
+            while len(_search_cache) > SEARCH_CACHE_SIZE:
+                _search_cache.popitem(last=False)
+    ranked = entry[1]
+    start = bisect_right(ranked, after) if after is not None else 0
+    page = ranked[start:start + SEARCH_LIMIT + 1]
+    if len(page) <= SEARCH_LIMIT and len(ranked) == SEARCH_CACHE_ROWS:
+        # Past the cached ranking: keyset query straight against the index
+        page += fts_ranked(db, table, match, page[-1] if page else after, SEARCH_LIMIT + 1 - len(page))
+    return page
+
+def parse_cursor(cursor):
+    # "score:id" for ranked FTS pages, "id" for the LIKE fallback; anything else starts over
+    try:
+        if ":" in cursor:
+            score, sid = cursor.split(":", 1)
+            return float(score), int(sid)
+        return int(cursor)
+    except (TypeError, ValueError):
+        return None
+
+def search_students(db, keyword, after=None):
+    # Returns (students, next_after): SEARCH_LIMIT per page, best match first;
+    # pass next_after back as `after` for the next page (None on the last one)
+    cursor = parse_cursor(after) if after else None
+    exact_id = int(keyword) if keyword.isdigit() else None
+    students = []
+    if exact_id is not None and cursor is None:
+        exact = db.get(Student, exact_id)
+        if exact:
+            students.append(exact)
+
+    terms = keyword.split()
+    if SEARCH_INDEX_ENABLED:
+        if not isinstance(cursor, tuple):
+            cursor = None
+        # Quote every term so FTS5 treats it as a literal
+        quoted = ['"' + t.replace('"', '""') + '"' for t in terms]
+        if all(len(t) >= 3 for t in terms):
+            hits = fts_page(db, "students_fts", " ".join(quoted), cursor)
+        else:
+            hits = fts_page(db, "students_prefix", " ".join(q + "*" for q in quoted), cursor)
+        ids = [sid for _, sid in hits[:SEARCH_LIMIT]]
+        by_id = {s.id: s for s in db.query(Student).filter(Student.id.in_(ids))}
+        matches = [by_id[i] for i in ids if i in by_id]
+        next_after = "%r:%d" % hits[SEARCH_LIMIT - 1] if len(hits) > SEARCH_LIMIT else None
+    else:
+        if not isinstance(cursor, int):
+            cursor = None
+        like = f"%{keyword}%"
+        query = db.query(Student).filter(
+            (Student.name.like(like)) |
+            (Student.room.like(like)) |
+            (Student.phone.like(like)) |
+            (Student.email.like(like))
+        )
+        if cursor is not None:
+            query = query.filter(Student.id < cursor)
+        hits = query.order_by(Student.id.desc()).limit(SEARCH_LIMIT + 1).all()
+        matches = hits[:SEARCH_LIMIT]
+        next_after = str(matches[-1].id) if len(hits) > SEARCH_LIMIT else None
+
+    # The exact id match is shown first on the first page only
+    students += [s for s in matches if s.id != exact_id]
+    return students, next_after
+
+# -------------------- SYNTHETIC DATA ---------------
+# Rows per multi-row INSERT/commit, students per room
+SEED_BATCH_SIZE = int(os.getenv("SEED_BATCH_SIZE", 5000))
+SEED_ROOM_CAPACITY = int(os.getenv("SEED_ROOM_CAPACITY", 3))
+
+SEED_FIRST = ("Aarav", "Vivaan", "Aditya", "Ishaan", "Arjun", "Kabir", "Rohan", "Dev", "Karan", "Rahul",
+              "Diya", "Ananya", "Saanvi", "Meera", "Riya", "Isha", "Priya", "Neha", "Kavya", "Pooja")
+SEED_LAST = ("Sharma", "Verma", "Gupta", "Mathur", "Iyer", "Reddy", "Nair", "Khan", "Singh", "Das",
+             "Patel", "Joshi", "Mehta", "Rao", "Bose", "Kulkarni", "Menon", "Pillai", "Chopra", "Malhotra")
+
+def synthetic_room(n):
+    # Rooms fill SEED_ROOM_CAPACITY at a time: blocks A-Z, 10 floors of 40 rooms, then A2-Z2, ...
+    room = n // SEED_ROOM_CAPACITY
+    block, rest = divmod(room, 400)
+    label = chr(ord("A") + block % 26) + (str(block // 26 + 1) if block >= 26 else "")
+    return f"{label}-{rest // 40 + 1}{rest % 40 + 1:02d}"
+
+def synthetic_students(count, start_id=1, seed=42):
+    # Deterministic student rows spread over the past year
+    rnd = random.Random(seed)
+    now = datetime.utcnow().replace(microsecond=0)
+    for sid in range(start_id, start_id + count):
+        first, last = rnd.choice(SEED_FIRST), rnd.choice(SEED_LAST)
+        yield {
+            "id": sid,
+            "name": f"{first} {last}",
+            "room": synthetic_room(sid - 1),
+            "phone": f"{rnd.randint(6, 9)}{rnd.randint(0, 999999999):09d}",
+            "email": f"{first}.{last}{sid}@hostel.edu".lower(),
+            "fees_paid": rnd.random() < 0.7,
+            "created_at": now - timedelta(seconds=rnd.randint(0, 365 * 24 * 3600)),
+        }
+
+def seed_students(db, count, start_id=None, seed=42, batch_size=SEED_BATCH_SIZE):
+    if start_id is None:
+        start_id = (db.query(func.max(Student.id)).scalar() or 0) + 1
+    rows = synthetic_students(count, start_id, seed)
+    inserted = 0
+    try:
+        while inserted < count:
+            batch = [row for _, row in zip(range(batch_size), rows)]
+            # One multi-row INSERT and one commit per batch; the students_version_ai
+            # trigger bumps search_version in the same transaction as each batch
+            db.execute(insert(Student), batch)
+            db.commit()
+            inserted += len(batch)
+    except (IntegrityError, OperationalError):
+        db.rollback()
+        raise
+    return inserted
 
 # -------------------- FLASK APP ----------------------
 app = Flask(__name__)
@@ -203,36 +534,117 @@ def inject_now():
     return {"now": datetime.utcnow}
 
 def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
+    # One session per request, closed in close_db() however the route exits
+    if "db" not in g:
+        g.db = SessionLocal()
+    return g.db
+
+@app.teardown_appcontext
+def close_db(exc):
+    db = g.pop("db", None)
+    if db is not None:
+        if exc is not None:
+            db.rollback()
         db.close()
+    SessionLocal.remove()
+
+# -------------------- STARTUP ------------------------
+# Nothing touches the database at import time. DB_INIT=lazy applies pending
+# migrations on the first request, DB_INIT=skip only waits for a one-shot
+# `flask db-migrate` to have done it. Requests wait up to DB_INIT_WAIT before
+# getting a 503 while a background thread retries with backoff.
+DB_INIT = os.getenv("DB_INIT", "lazy")
+DB_INIT_WAIT = float(os.getenv("DB_INIT_WAIT", 5))
+DB_INIT_BACKOFF_MAX = float(os.getenv("DB_INIT_BACKOFF_MAX", 60))
+
+NO_DB_ENDPOINTS = {"static", "pool_stats"}
+
+_db_ready = threading.Event()
+_db_init_lock = threading.Lock()
+_db_init_thread = None
+
+class DatabaseStarting(Exception):
+    pass
+
+def init_db():
+    migrate()
+    detect_search_index()
+
+def check_db():
+    # DB_INIT=skip: the schema belongs to `flask db-migrate`; only confirm it has run
+    with engine.connect() as conn:
+        pending = pending_migrations(conn)
+    if pending:
+        raise RuntimeError(f"migrations {pending} not applied yet; run `flask db-migrate`")
+    detect_search_index()
+
+def prepare_db():
+    if DB_INIT == "skip":
+        check_db()
+    else:
+        init_db()
+
+def init_db_with_backoff():
+    delay = 1
+    while True:
+        try:
+            prepare_db()
+            _db_ready.set()
+            return
+        except Exception as e:
+            print(f"Database not ready ({e}), retrying in {delay}s")
+            time.sleep(delay)
+            delay = min(delay * 2, DB_INIT_BACKOFF_MAX)
+
+def start_db_init():
+    global _db_init_thread
+    with _db_init_lock:
+        if _db_init_thread is None:
+            _db_init_thread = threading.Thread(target=init_db_with_backoff, name="db-init", daemon=True)
+            _db_init_thread.start()
+
+def wait_for_db(timeout=None):
+    start_db_init()
+    return _db_ready.wait(timeout)
+
+@app.before_request
+def require_db():
+    if _db_ready.is_set() or request.endpoint in NO_DB_ENDPOINTS:
+        return
+    if not wait_for_db(DB_INIT_WAIT):
+        raise DatabaseStarting()
+
+@app.errorhandler(DatabaseStarting)
+def database_starting(e):
+    return ("Starting up, please retry shortly.", 503, {"Retry-After": "2"})
+
+@app.route("/pool-stats")
+def pool_stats():
+    with _pool_stats_lock:
+        stats = dict(POOL_STATS)
+    stats["in_use"] = stats["checkouts"] - stats["checkins"]
+    stats["pool"] = engine.pool.status()
+    return jsonify(stats)
 
 # -------------------- ROUTES -------------------------
 
 @app.route("/")
 def index():
-    keyword = request.args.get("keyword", "")
-    db = next(get_db())
+    keyword = request.args.get("keyword", "").strip()
+    db = get_db()
+    next_after = None
 
     if keyword:
-        like = f"%{keyword}%"
-        students = db.query(Student).filter(
-            (Student.id.like(like)) |
-            (Student.name.like(like)) |
-            (Student.room.like(like)) |
-            (Student.phone.like(like))
-        ).order_by(Student.created_at.desc()).all()
+        students, next_after = search_students(db, keyword, request.args.get("after"))
     else:
         students = db.query(Student).order_by(Student.created_at.desc()).all()
 
-    return render_template("index.html", students=students, keyword=keyword)
+    return render_template("index.html", students=students, keyword=keyword, next_after=next_after)
 
 @app.route("/add", methods=["GET", "POST"])
 def add_student():
     if request.method == "POST":
-        db = next(get_db())
+        db = get_db()
         try:
             student = Student(
                 id=int(request.form["id"]),
@@ -253,7 +665,7 @@ def add_student():
 
 @app.route("/edit/<int:sid>", methods=["GET", "POST"])
 def edit_student(sid):
-    db = next(get_db())
+    db = get_db()
     student = db.query(Student).filter_by(id=sid).first()
 
     if not student:
@@ -273,7 +685,7 @@ def edit_student(sid):
 
 @app.route("/pay/<int:sid>")
 def pay_fees(sid):
-    db = next(get_db())
+    db = get_db()
     student = db.query(Student).filter_by(id=sid).first()
 
     if student:
@@ -285,7 +697,7 @@ def pay_fees(sid):
 
 @app.route("/delete/<int:sid>", methods=["GET", "POST"])
 def delete_student(sid):
-    db = next(get_db())
+    db = get_db()
     student = db.query(Student).filter_by(id=sid).first()
 
     if request.method == "POST":
@@ -297,6 +709,76 @@ def delete_student(sid):
 
     return render_template("confirm_delete.html", student=student)
 
+@app.cli.command("seed-students")
+@click.argument("count", type=click.IntRange(min=1))
+@click.option("--start-id", type=int, default=None, help="First id to use (default: after the current max id).")
+@click.option("--seed", type=int, default=42, show_default=True, help="Random seed; same seed, same rows.")
+@click.option("--batch-size", type=click.IntRange(min=1), default=SEED_BATCH_SIZE, show_default=True)
+def seed_students_command(count, start_id, seed, batch_size):
+    """Insert COUNT synthetic students for load and sizing tests."""
+    prepare_db()
+    started = time.perf_counter()
+    try:
+        inserted = seed_students(get_db(), count, start_id, seed, batch_size)
+    except IntegrityError as e:
+        raise click.ClickException(f"{e.orig}; choose a free --start-id")
+    elapsed = time.perf_counter() - started
+    click.echo(f"Seeded {inserted} students in {elapsed:.1f}s ({inserted / elapsed:.0f} rows/s)")
+
+@app.cli.command("db-migrate")
+@click.option("--status", is_flag=True, help="List applied and pending migrations without applying any.")
+def db_migrate_command(status):
+    """Apply pending schema migrations."""
+    if not status:
+        click.echo(f"Applied {len(migrate())} migrations")
+    with engine.connect() as conn:
+        done = applied_migrations(conn)
+    if status:
+        for version, name, _ in MIGRATIONS:
+            click.echo(f"{'applied' if version in done else 'pending':8} {version:3}  {name}")
+
+# Hot queries; EXPLAIN must not show a full scan of students
+PLAN_CHECK_MIN_ROWS = int(os.getenv("PLAN_CHECK_MIN_ROWS", 1000))
+PLAN_CHECKS = [
+    ("list page", "SELECT id FROM students ORDER BY created_at DESC", {}),
+    ("student by id", "SELECT id FROM students WHERE id = :id", {"id": 1}),
+    ("search hits by id", "SELECT id FROM students WHERE id IN (:a, :b)", {"a": 1, "b": 2}),
+]
+
+def check_query_plans():
+    # Returns (name, status, detail) per check; status is "ok", "small table" or "SCAN"
+    results = []
+    with engine.connect() as conn:
+        for name, sql, params in PLAN_CHECKS:
+            if conn.dialect.name == "sqlite":
+                plan = [row.detail for row in conn.execute(text("EXPLAIN QUERY PLAN " + sql), params)]
+                # "SCAN students USING INDEX ..." walks an index in order; bare "SCAN students" reads every row
+                status = "SCAN" if "SCAN students" in plan else "ok"
+                detail = "; ".join(plan)
+            else:
+                plan = [row._mapping for row in conn.execute(text("EXPLAIN " + sql), params)]
+                scans = [row for row in plan if row["table"] == "students" and row["type"] == "ALL"]
+                detail = "; ".join(f"type={row['type']} key={row['key']} rows={row['rows']}" for row in plan)
+                if not scans:
+                    status = "ok"
+                elif max(int(row["rows"] or 0) for row in scans) < PLAN_CHECK_MIN_ROWS:
+                    # The optimizer prefers a scan on tiny tables even when an index exists
+                    status = "small table"
+                else:
+                    status = "SCAN"
+            results.append((name, status, detail))
+    return results
+
+@app.cli.command("check-plans")
+def check_plans_command():
+    """EXPLAIN the hot student queries and fail if any does a full table scan."""
+    prepare_db()
+    results = check_query_plans()
+    for name, status, detail in results:
+        click.echo(f"{status:12} {name:20} {detail}")
+    if any(status == "SCAN" for _, status, _ in results):
+        raise click.ClickException("full table scans found; add an index in a new migration")
+
 # -------------------- MAIN ---------------------------
 
 if __name__ == "__main__":
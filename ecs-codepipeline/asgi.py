@@ -0,0 +1,159 @@
+"""Optional ASGI entrypoint: the same routes and templates as app.py, served by
+Quart with an async SQLAlchemy engine (aiosqlite for SQLite, aiomysql for MySQL).
+
+    uvicorn asgi:app --host 0.0.0.0 --port 5000 --workers 2
+
+A request waiting on the database yields the event loop instead of holding a
+whole gunicorn sync worker, so one process keeps serving other requests.
+"""
+import asyncio
+import os
+from datetime import datetime
+from quart import Quart, request, render_template, flash, redirect, url_for, g, jsonify
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+# Schema, migrations, FTS5 index and search code are shared with the sync app
+from app import DATABASE_URL, DB_INIT_WAIT, NO_DB_ENDPOINTS, Student, search_students, wait_for_db
+
+# -------------------- DB CONFIG ---------------------
+ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite", "mysql+pymysql": "mysql+aiomysql", "mysql": "mysql+aiomysql"}
+
+def async_url(url):
+    scheme, sep, rest = url.partition("://")
+    return ASYNC_DRIVERS.get(scheme, scheme) + sep + rest
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", async_url(DATABASE_URL))
+
+engine = create_async_engine(ASYNC_DATABASE_URL)
+# Templates read attributes after commit, so keep loaded objects populated
+SessionLocal = async_sessionmaker(engine, expire_on_commit=False)
+
+# -------------------- QUART APP ----------------------
+app = Quart(__name__)
+app.secret_key = os.getenv("FLASK_SECRET", "dev-secret")
+
+@app.context_processor
+def inject_now():
+    return {"now": datetime.utcnow}
+
+def get_db():
+    # One session per request, closed in close_db() however the route exits
+    if "db" not in g:
+        g.db = SessionLocal()
+    return g.db
+
+@app.teardown_appcontext
+async def close_db(exc):
+    db = g.pop("db", None)
+    if db is not None:
+        if exc is not None:
+            await db.rollback()
+        await db.close()
+
+@app.before_request
+async def require_db():
+    # Same lazy startup as app.py; the migrations run once in its db-init thread
+    if request.endpoint in NO_DB_ENDPOINTS or wait_for_db(0):
+        return
+    if not await asyncio.to_thread(wait_for_db, DB_INIT_WAIT):
+        return "Starting up, please retry shortly.", 503, {"Retry-After": "2"}
+
+@app.after_serving
+async def dispose_engine():
+    await engine.dispose()
+
+@app.route("/pool-stats")
+async def pool_stats():
+    return jsonify(in_use=engine.pool.checkedout(), pool=engine.pool.status())
+
+# -------------------- ROUTES -------------------------
+
+@app.route("/")
+async def index():
+    keyword = request.args.get("keyword", "").strip()
+    db = get_db()
+    next_after = None
+
+    if keyword:
+        students, next_after = await db.run_sync(search_students, keyword, request.args.get("after"))
+    else:
+        students = (await db.scalars(select(Student).order_by(Student.created_at.desc()))).all()
+
+    return await render_template("index.html", students=students, keyword=keyword, next_after=next_after)
+
+@app.route("/add", methods=["GET", "POST"])
+async def add_student():
+    if request.method == "POST":
+        form = await request.form
+        db = get_db()
+        try:
+            student = Student(
+                id=int(form["id"]),
+                name=form["name"],
+                room=form["room"],
+                phone=form.get("phone") or None,
+                email=form.get("email") or None,
+            )
+            db.add(student)
+            await db.commit()
+            await flash("Student added successfully", "success")
+        except IntegrityError:
+            await db.rollback()
+            await flash("Student ID already exists", "danger")
+        return redirect(url_for("index"))
+
+    return await render_template("add_edit_student.html", action="Add", student=None)
+
+@app.route("/edit/<int:sid>", methods=["GET", "POST"])
+async def edit_student(sid):
+    db = get_db()
+    student = await db.get(Student, sid)
+
+    if not student:
+        await flash("Student not found", "warning")
+        return redirect(url_for("index"))
+
+    if request.method == "POST":
+        form = await request.form
+        student.name = form["name"]
+        student.room = form["room"]
+        student.phone = form.get("phone")
+        student.email = form.get("email")
+        await db.commit()
+        await flash("Student updated", "success")
+        return redirect(url_for("index"))
+
+    return await render_template("add_edit_student.html", action="Edit", student=student)
+
+@app.route("/pay/<int:sid>")
+async def pay_fees(sid):
+    db = get_db()
+    student = await db.get(Student, sid)
+
+    if student:
+        student.fees_paid = True
+        await db.commit()
+        await flash("Fees marked as paid", "success")
+
+    return redirect(url_for("index"))
+
+@app.route("/delete/<int:sid>", methods=["GET", "POST"])
+async def delete_student(sid):
+    db = get_db()
+    student = await db.get(Student, sid)
+
+    if request.method == "POST":
+        if student:
+            await db.delete(student)
+            await db.commit()
+            await flash("Student deleted", "success")
+        return redirect(url_for("index"))
+
+    return await render_template("confirm_delete.html", student=student)
+
+# -------------------- MAIN ---------------------------
+
+if __name__ == "__main__":
+    app.run(host="0.0.0.0", port=5000)
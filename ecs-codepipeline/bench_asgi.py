@@ -0,0 +1,133 @@
+"""Server benchmark: gunicorn sync workers (app:app) vs uvicorn (asgi:app).
+
+Both servers run against the same seeded scratch database. The RSS of each
+server's process tree is printed next to req/s and latency; raise
+BENCH_SYNC_WORKERS until the gunicorn row uses as much memory as the uvicorn
+row to compare them at equal memory.
+
+    python bench_asgi.py
+    BENCH_WORKERS=2 BENCH_SYNC_WORKERS=3 BENCH_CONCURRENCY=64 python bench_asgi.py
+"""
+import http.client
+import os
+import random
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+N_STUDENTS = int(os.getenv("BENCH_STUDENTS", 5_000))
+N_REQUESTS = int(os.getenv("BENCH_REQUESTS", 3_000))
+CONCURRENCY = int(os.getenv("BENCH_CONCURRENCY", 32))
+WORKERS = int(os.getenv("BENCH_WORKERS", 2))
+SYNC_WORKERS = int(os.getenv("BENCH_SYNC_WORKERS", WORKERS))
+PORT = int(os.getenv("BENCH_PORT", 5077))
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Importing bench_search points the app (and the servers started below) at a scratch database
+from bench_search import seed  # noqa: E402
+
+SERVERS = {
+    "gunicorn-sync": ["gunicorn", "-b", f"127.0.0.1:{PORT}", "-w", str(SYNC_WORKERS), "app:app"],
+    "uvicorn-asgi": ["uvicorn", "asgi:app", "--host", "127.0.0.1", "--port", str(PORT),
+                     "--workers", str(WORKERS), "--log-level", "warning"],
+}
+
+def tree_rss_mb(pid):
+    children = {}
+    for entry in os.listdir("/proc"):
+        if entry.isdigit():
+            try:
+                with open(f"/proc/{entry}/stat") as f:
+                    ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+            except OSError:
+                continue
+            children.setdefault(ppid, []).append(int(entry))
+
+    total, stack = 0, [pid]
+    while stack:
+        p = stack.pop()
+        stack += children.get(p, [])
+        try:
+            with open(f"/proc/{p}/status") as f:
+                total += next(int(line.split()[1]) for line in f if line.startswith("VmRSS:"))
+        except (OSError, StopIteration):
+            pass
+    return total / 1024
+
+def wait_ready(proc):
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            sys.exit(f"server exited with {proc.returncode}")
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", PORT, timeout=1)
+            conn.request("GET", "/pool-stats")
+            conn.getresponse().read()
+            conn.close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    sys.exit("server did not start within 30s")
+
+def make_paths(rows):
+    rnd = random.Random(7)
+    paths = []
+    for _ in range(N_REQUESTS):
+        sid, name, room, phone, email = rnd.choice(rows)
+        paths.append(rnd.choice([
+            f"/?keyword={name.split()[1]}", f"/?keyword={room}", f"/?keyword={sid}", f"/edit/{sid}",
+        ]))
+    return paths
+
+def client(paths, timings, errors):
+    conn = http.client.HTTPConnection("127.0.0.1", PORT, timeout=30)
+    for path in paths:
+        t0 = time.perf_counter()
+        try:
+            conn.request("GET", path)
+            resp = conn.getresponse()
+            resp.read()
+            if resp.status != 200:
+                errors.append(resp.status)
+        except (OSError, http.client.HTTPException) as e:
+            errors.append(type(e).__name__)
+            conn.close()
+            conn = http.client.HTTPConnection("127.0.0.1", PORT, timeout=30)
+        timings.append((time.perf_counter() - t0) * 1000)
+    conn.close()
+
+def run(name, paths):
+    proc = subprocess.Popen(SERVERS[name], cwd=HERE, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_ready(proc)
+        timings, errors = [], []
+        threads = [threading.Thread(target=client, args=(paths[i::CONCURRENCY], timings, errors))
+                   for i in range(CONCURRENCY)]
+        start = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - start
+        rss = tree_rss_mb(proc.pid)
+    finally:
+        proc.terminate()
+        proc.wait()
+
+    q = statistics.quantiles(timings, n=100)
+    print(f"{name:14} {len(timings) / elapsed:8.1f} req/s  p50={q[49]:.1f}ms p99={q[98]:.1f}ms  "
+          f"rss={rss:.0f}MB  errors={len(errors)}")
+
+def main():
+    rows = seed(N_STUDENTS)
+    paths = make_paths(rows)
+    print(f"{N_STUDENTS} students, {N_REQUESTS} requests, concurrency={CONCURRENCY}, "
+          f"workers={SYNC_WORKERS} sync / {WORKERS} async")
+    for name in SERVERS:
+        run(name, paths)
+
+if __name__ == "__main__":
+    main()
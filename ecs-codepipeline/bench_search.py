@@ -0,0 +1,85 @@
+"""Search benchmark: seeds a throwaway SQLite DB and times search_students(),
+for the first page of every query and the second page of those that have one.
+
+"uncached" empties the ranking cache before each query, so every search pays
+for bm25 over all its matches; "cached" is a keyword searched again before any
+write, e.g. paging through results.
+
+    python bench_search.py            # 100k students, 500 queries
+    BENCH_STUDENTS=1000000 python bench_search.py
+"""
+import os
+import random
+import statistics
+import string
+import tempfile
+import time
+
+N_STUDENTS = int(os.getenv("BENCH_STUDENTS", 100_000))
+N_QUERIES = int(os.getenv("BENCH_QUERIES", 500))
+
+# Point the app at a scratch database before it is imported
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+
+import app  # noqa: E402
+
+FIRST = ["Aarav", "Vivaan", "Aditya", "Ishaan", "Diya", "Ananya", "Saanvi", "Meera", "Kabir", "Riya"]
+LAST = ["Sharma", "Verma", "Gupta", "Mathur", "Iyer", "Reddy", "Nair", "Khan", "Singh", "Das"]
+
+def seed(n):
+    app.init_db()
+    rnd = random.Random(42)
+    rows = []
+    for i in range(1, n + 1):
+        name = f"{rnd.choice(FIRST)} {rnd.choice(LAST)} {''.join(rnd.choices(string.ascii_lowercase, k=4))}"
+        rows.append((i, name, f"{rnd.choice('ABCDEF')}-{rnd.randint(100, 999)}",
+                     f"9{rnd.randint(0, 999999999):09d}", f"student{i}@hostel.edu"))
+    raw = app.engine.raw_connection()
+    try:
+        raw.executemany("INSERT INTO students (id, name, room, phone, email) VALUES (?, ?, ?, ?, ?)", rows)
+        raw.commit()
+    finally:
+        raw.close()
+    return rows
+
+def main():
+    start = time.perf_counter()
+    rows = seed(N_STUDENTS)
+    print(f"seeded {N_STUDENTS} students in {time.perf_counter() - start:.1f}s "
+          f"(fts5 index: {app.SEARCH_INDEX_ENABLED})")
+
+    rnd = random.Random(7)
+    keywords = []
+    for _ in range(N_QUERIES):
+        sid, name, room, phone, email = rnd.choice(rows)
+        keywords.append(rnd.choice([
+            str(sid), name.split()[1], name.split()[2], room, phone[:6], email.split("@")[0], room[:1],
+        ]))
+
+    db = app.SessionLocal()
+    timings = {"first page, uncached": [], "first page, cached": [], "second page, cached": []}
+    try:
+        for kw in keywords:
+            app._search_cache.clear()
+            for label in ("first page, uncached", "first page, cached"):
+                t0 = time.perf_counter()
+                _, next_after = app.search_students(db, kw)
+                timings[label].append((time.perf_counter() - t0) * 1000)
+                db.expunge_all()
+            if next_after is not None:
+                t0 = time.perf_counter()
+                app.search_students(db, kw, next_after)
+                timings["second page, cached"].append((time.perf_counter() - t0) * 1000)
+                db.expunge_all()
+    finally:
+        db.close()
+
+    for label, timings in timings.items():
+        if len(timings) < 2:
+            continue
+        q = statistics.quantiles(timings, n=100, method="inclusive")
+        print(f"{len(timings)} searches, {label}: p50={q[49]:.2f}ms p95={q[94]:.2f}ms "
+              f"p99={q[98]:.2f}ms max={max(timings):.2f}ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Metrics overhead benchmark: per-request cost of the Prometheus hooks in app.py.
+
+No database needed: app.py only connects on the first request. The
+"prometheus_client only" line is the floor: the library's own inc()/observe()
+calls for the three samples, which the hook cannot get below. Before timing,
+the statement fingerprints of the search queries are checked, since a wrong
+fingerprint means a wrong db_query_duration_seconds label.
+
+    python bench_metrics.py                   # single-process registry
+    BENCH_MULTIPROC=1 python bench_metrics.py # prometheus_client multiprocess mode
+"""
+import os
+import tempfile
+import time
+
+N_REQUESTS = int(os.getenv("BENCH_REQUESTS", 200_000))
+
+# Multiprocess mode is picked when prometheus_client is imported, so set it up first
+if os.getenv("BENCH_MULTIPROC") == "1":
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = tempfile.mkdtemp()
+
+import app  # noqa: E402
+from flask import Response  # noqa: E402
+
+def per_request_us(fn, n=N_REQUESTS):
+    start = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - start) / n * 1e6
+
+def uncached():
+    # What _record_metrics did before label children were cached
+    app.REQUEST_COUNT.labels("GET", "index", 200).inc()
+    app.REQUEST_LATENCY.labels("index").observe(0.012)
+    app.RESPONSE_SIZE.labels("index").observe(16384)
+
+def cached():
+    app.metric_child(app.REQUEST_COUNT, "GET", "index", 200).inc()
+    app.metric_child(app.REQUEST_LATENCY, "index").observe(0.012)
+    app.metric_child(app.RESPONSE_SIZE, "index").observe(16384)
+
+LATENCY, SIZE, _ = app.endpoint_children("index")
+COUNT = app.metric_child(app.REQUEST_COUNT, "GET", "index", 200)
+
+def library_only():
+    COUNT.inc()
+    LATENCY.observe(0.012)
+    SIZE.observe(16384)
+
+def search_sql(keyword):
+    # Same statement shape as the search route
+    where, _, score, _ = app.search_clause(keyword)
+    return f"SELECT *, {score} AS score FROM students WHERE {where} ORDER BY score DESC LIMIT %s OFFSET %s"
+
+def check_fingerprints():
+    expected = {
+        search_sql("Rahul"): "SELECT students by fulltext",
+        search_sql("Rahul K"): "SELECT students by fulltext,name,room,email",
+        search_sql("A-1"): "SELECT students by name,room,email",
+        search_sql("101"): "SELECT students by id,phone,room",
+        "UPDATE students SET fees_paid = 1 WHERE id IN (%s, %s)": "UPDATE students by id",
+    }
+    for sql, fingerprint in expected.items():
+        got = app.statement_fingerprint(sql)
+        assert got == fingerprint, f"{sql!r}: {got!r} != {fingerprint!r}"
+
+def main():
+    check_fingerprints()
+    print(f"multiprocess={app.MULTIPROCESS_METRICS} requests={N_REQUESTS}")
+    print(f"labels() each time:   {per_request_us(uncached):.2f} us/request")
+    print(f"cached label children: {per_request_us(cached):.2f} us/request")
+    print(f"prometheus_client only: {per_request_us(library_only):.2f} us/request")
+
+    # Full after_request hook, as Flask runs it
+    response = Response(b"x" * 16384)
+    with app.app.test_request_context("/"):
+        app.request._start_time = time.perf_counter()
+        cost = per_request_us(lambda: app._record_metrics(response))
+    print(f"_record_metrics hook:  {cost:.2f} us/request")
+
+if __name__ == "__main__":
+    main()
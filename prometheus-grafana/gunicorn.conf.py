@@ -0,0 +1,23 @@
+import os
+import shutil
+import tempfile
+
+# prometheus_client picks multiprocess mode when it is first imported, here in
+# the master, and workers inherit that; the Dockerfile sets the directory explicitly
+os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", os.path.join(tempfile.gettempdir(), "prometheus_multiproc"))
+
+from prometheus_client import multiprocess  # noqa: E402
+
+bind = "0.0.0.0:5000"
+workers = int(os.getenv("WEB_CONCURRENCY", 2))
+# app.py sizes its DB pool from WEB_THREADS, so keep the two in step
+threads = int(os.getenv("WEB_THREADS", 4))
+
+def on_starting(server):
+    # Samples from a previous run would be summed into the new one
+    metrics_dir = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir)
+
+def child_exit(server, worker):
+    multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,6 @@
+import os
+
+bind = "0.0.0.0:5000"
+workers = int(os.getenv("WEB_CONCURRENCY", 2))
+# app.py sizes its DB pool from WEB_THREADS, so keep the two in step
+threads = int(os.getenv("WEB_THREADS", 4))